@@ -16,6 +16,7 @@ bl_info = {
 modules = (
     "preferences",
     "properties",
+    "operators",
     "ui"
 )
 
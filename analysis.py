@@ -0,0 +1,303 @@
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+__all__ = ['MeshAnalysis', 'find_doubles']
+
+
+# cells of the half neighbourhood of a cell, itself included, so that every
+# pair of neighbouring cells is compared once
+_NEIGHBOURS = [(x, y, z) for x in (-1, 0, 1) for y in (-1, 0, 1)
+               for z in (-1, 0, 1) if (x, y, z) >= (0, 0, 0)]
+
+
+def find_doubles(co, distance):
+    """
+    Indices of the verts of co closer than distance to another vert. The
+    verts are sorted in the cells of a grid, so that only the verts of a
+    cell and of its neighbour cells are compared.
+    """
+    if len(co) < 2:
+        return np.zeros(0, dtype=np.int32)
+
+    # cells bigger than distance, so that only the verts close to a side of
+    # their cell are looked up in the neighbour cell, and few enough for
+    # their linear index to fit in an int64
+    low = co.min(axis=0)
+    size = max(distance * 4, float((co.max(axis=0) - low).max()) / 2 ** 20)
+    scaled = (co - low) / size
+    cells = scaled.astype(np.int64)
+    fractions = scaled - cells
+    # a margin of one cell on each side for the neighbours
+    cells += 1
+    dims = cells.max(axis=0) + 2
+    keys = (cells[:, 0] * dims[1] + cells[:, 1]) * dims[2] + cells[:, 2]
+
+    # in the order of the keys, keys of neighbour cells stay sorted
+    order = np.argsort(keys, kind='stable')
+    keys = keys[order]
+    fractions = fractions[order]
+    margin = distance / size
+
+    flagged = np.zeros(len(co), dtype=bool)
+    for neighbour in _NEIGHBOURS:
+        queries = np.ones(len(keys), dtype=bool)
+        for axis, side in enumerate(neighbour):
+            if side > 0:
+                queries &= fractions[:, axis] >= 1 - margin
+            elif side < 0:
+                queries &= fractions[:, axis] <= margin
+        queries = np.flatnonzero(queries)
+        delta = (neighbour[0] * dims[1] + neighbour[1]) * dims[2] + \
+            neighbour[2]
+        targets = keys[queries] + delta
+        start = np.searchsorted(keys, targets, side='left')
+        counts = np.searchsorted(keys, targets, side='right') - start
+
+        # every querying vert against every vert of the neighbour cell
+        first = np.repeat(queries, counts)
+        ramp = np.arange(len(first)) - np.repeat(np.cumsum(counts) - counts,
+                                                 counts)
+        second = np.repeat(start, counts) + ramp
+
+        pairs = first != second
+        first = order[first[pairs]]
+        second = order[second[pairs]]
+        offsets = co[first] - co[second]
+        close = np.einsum('ij,ij->i', offsets, offsets) <= distance ** 2
+        flagged[first[close]] = True
+        flagged[second[close]] = True
+
+    return np.flatnonzero(flagged).astype(np.int32)
+
+
+def _read(collection, attr, dtype, width=1):
+    """Read attr of every item of collection into a flat numpy array."""
+    datas = np.empty(len(collection) * width, dtype=dtype)
+    collection.foreach_get(attr, datas)
+    if width > 1:
+        datas = datas.reshape(-1, width)
+    return datas
+
+
+class MeshAnalysis:
+    """
+    bmesh free representation of a mesh, read with foreach_get, that the
+    checkers use in OBJECT mode to classify faces, edges and verts with
+    vectorized operations.
+    """
+
+    POLES = {'isolated_verts': lambda valence: valence == 0,
+             'n_poles': lambda valence: valence == 3,
+             'e_poles': lambda valence: valence == 5,
+             'more_poles': lambda valence: valence > 5}
+
+    CHECKERS = ('triangles', 'ngons', 'non_manifold') + tuple(POLES)
+    # checkers drawing their flagged faces, see face_datas
+    FACE_CHECKERS = ('triangles', 'ngons')
+    FACE_DATAS = ('faces', 'sides', 'tri_counts', 'tris', 'edges')
+
+    def __init__(self, mesh, cache=None, deferred=False):
+        """
+        :param cache: optional ResultCache, the flagged elements and the
+        overlay datas are loaded from it when mesh has already been
+        analyzed, see key_arrays
+        :param deferred: only snapshot the arrays of mesh, the results being
+        computed later by analyze, which doesn't use bpy and can run in
+        another thread
+        """
+        self.co = _read(mesh.vertices, "co", np.float32, 3)
+        self.normals = _read(mesh.vertices, "normal", np.float32, 3)
+        self.edge_verts = _read(mesh.edges, "vertices", np.int32, 2)
+        self.loop_total = _read(mesh.polygons, "loop_total", np.int32)
+        self.loop_edges = _read(mesh.loops, "edge_index", np.int32)
+
+        mesh.calc_loop_triangles()
+        self.looptris = _read(mesh.loop_triangles, "vertices", np.int32, 3)
+        self.looptri_faces = _read(mesh.loop_triangles, "polygon_index",
+                                   np.int32)
+
+        # polygon owning each loop
+        self.loop_faces = np.repeat(
+                np.arange(len(self.loop_total), dtype=np.int32),
+                self.loop_total)
+
+        self.results = None
+        # overlay datas derived from the results, see analyze
+        self._tri_counts = None
+        self._face_datas = {}
+        self._doubles = None
+        self._cache = cache
+        if not deferred:
+            self.analyze()
+
+    def analyze(self, cache=True, checkers=(), distance=None):
+        """
+        Load or compute the results, and return the analysis. Without bpy,
+        it can run in another thread, along with the derivation of the
+        overlay datas of checkers, which are computed on their first use
+        otherwise.
+        :param cache: use the ResultCache of the analysis, if any
+        :param checkers: enabled checkers, see checker_datas and doubles
+        :param distance: doubles distance
+        """
+        doubles = 'doubles' in checkers and distance is not None
+        use_cache = self._cache is not None and cache
+        entry = {}
+        self.results = None
+        if use_cache:
+            key = self._cache.key(self.key_arrays(
+                    distance if doubles else None))
+            entry = self._cache.load(key) or {}
+            self._restore(entry, distance)
+
+        if self.results is None:
+            self.results = self.classify()
+        for check in self.FACE_CHECKERS:
+            if check in checkers:
+                self.checker_datas(check)
+        if doubles:
+            self.doubles(distance)
+
+        if use_cache:
+            saved = self._entry(doubles)
+            if saved.keys() != entry.keys():
+                self._cache.save(key, saved)
+        return self
+
+    def _entry(self, doubles):
+        """Arrays of the results and of the overlay datas, by name"""
+        entry = dict(self.results)
+        for check, datas in self._face_datas.items():
+            entry.update(zip((f"{check}.{name}" for name in self.FACE_DATAS),
+                             datas))
+        if doubles:
+            entry['doubles'] = self._doubles[1]
+        return entry
+
+    def _restore(self, entry, distance):
+        """Take the results and overlay datas of a cache entry, see _entry"""
+        if all(check in entry for check in self.CHECKERS):
+            self.results = {check: entry[check] for check in self.CHECKERS}
+        for check in self.FACE_CHECKERS:
+            names = [f"{check}.{name}" for name in self.FACE_DATAS]
+            if all(name in entry for name in names):
+                self._face_datas[check] = tuple(entry[name] for name in names)
+        if 'doubles' in entry:
+            self._doubles = (distance, entry['doubles'])
+
+    @staticmethod
+    def available():
+        return np is not None
+
+    @property
+    def memory(self):
+        """Bytes taken by the arrays of the analysis"""
+        arrays = [value for value in vars(self).values()
+                  if isinstance(value, np.ndarray)]
+        if self.results is not None:
+            arrays.extend(self.results.values())
+        for datas in self._face_datas.values():
+            arrays.extend(datas)
+        if self._doubles is not None:
+            arrays.append(self._doubles[1])
+        return sum(datas.nbytes for datas in arrays)
+
+    @property
+    def counts(self):
+        """verts, edges, faces and triangles counts"""
+        return (len(self.co), len(self.edge_verts), len(self.loop_total),
+                len(self.looptris))
+
+    def key_arrays(self, distance=None):
+        """
+        Arrays the results and the overlay datas depend on: the topology,
+        and the coordinates, which the triangles of the ngons and the
+        doubles depend on.
+        :param distance: doubles distance, when the doubles are cached
+        """
+        # the isolated verts are only known from the number of verts
+        verts = np.array([len(self.co)], dtype=np.int64)
+        arrays = (verts, self.edge_verts, self.loop_total, self.loop_edges,
+                  self.co)
+        if distance is not None:
+            arrays += (np.array([distance], dtype=np.float64),)
+        return arrays
+
+    def classify(self):
+        """Indices of the elements flagged by every checker"""
+        valence = np.bincount(self.edge_verts.ravel(),
+                              minlength=len(self.co))
+        # number of faces using each edge
+        edge_users = np.bincount(self.loop_edges,
+                                 minlength=len(self.edge_verts))
+
+        results = {
+            'triangles': np.flatnonzero(self.loop_total == 3),
+            'ngons': np.flatnonzero(self.loop_total > 4),
+            'non_manifold': np.flatnonzero(edge_users != 2)}
+        for pole_type, condition in self.POLES.items():
+            results[pole_type] = np.flatnonzero(condition(valence))
+        return {check: indices.astype(np.int32)
+                for check, indices in results.items()}
+
+    def faces_mask(self, check):
+        mask = np.zeros(len(self.loop_total), dtype=bool)
+        mask[self.results[check]] = True
+        return mask
+
+    def non_manifold(self):
+        return self.results['non_manifold']
+
+    def poles(self, pole_type):
+        return self.results[pole_type]
+
+    def face_tris(self, faces_mask):
+        """Verts of the loop triangles of the faces in faces_mask"""
+        return self.looptris[faces_mask[self.looptri_faces]].ravel()
+
+    def face_edges(self, faces_mask):
+        """Edges of the faces in faces_mask, once per face using them"""
+        return self.loop_edges[faces_mask[self.loop_faces]]
+
+    def edges_verts(self, edges):
+        return self.edge_verts[edges].ravel()
+
+    def face_datas(self, faces_mask):
+        """
+        Indices, sides, triangles counts, triangles verts and edges verts
+        of the faces in faces_mask, the results of MainGeo.
+        """
+        if self._tri_counts is None:
+            # degenerate ngons may have less than sides - 2 triangles
+            self._tri_counts = np.bincount(
+                    self.looptri_faces,
+                    minlength=len(self.loop_total)).astype(np.int32)
+        faces = np.flatnonzero(faces_mask).astype(np.int32)
+        return (faces, self.loop_total[faces], self._tri_counts[faces],
+                self.face_tris(faces_mask),
+                self.edges_verts(self.face_edges(faces_mask)))
+
+    def checker_datas(self, check):
+        """face_datas of the faces flagged by check, derived once"""
+        datas = self._face_datas.get(check)
+        if datas is None:
+            datas = self._face_datas[check] = self.face_datas(
+                    self.faces_mask(check))
+        return datas
+
+    def doubles(self, distance):
+        """Indices of the doubles of the verts, see find_doubles"""
+        if self._doubles is None or self._doubles[0] != distance:
+            self._doubles = (distance, find_doubles(self.co, distance))
+        return self._doubles[1]
+
+    def checker_counts(self):
+        """Number of flagged elements of every checker"""
+        return {check: len(indices) for check, indices in
+                self.results.items()}
+
+    def vert_buffers(self, verts):
+        """Local coordinates and normals of verts"""
+        return self.co[verts], self.normals[verts]
@@ -0,0 +1,151 @@
+"""
+Headless validation of .blend files, for build farms:
+
+    blender --background --python batch.py -- [-j JOBS] [-o REPORT]
+        [--flagged FLAGGED] FILES
+
+Every file is opened by its own worker Blender process, running this same
+script with --worker. Up to JOBS workers run at the same time, and their
+reports are merged in the REPORT json file. The indices of the flagged
+elements are streamed by the workers and concatenated in FLAGGED, a JSON
+Lines or CSV file depending on its extension.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from concurrent.futures import ThreadPoolExecutor
+
+import bpy
+
+# run as a script, outside of the add-on package
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from analysis import MeshAnalysis  # noqa: E402
+from report import ReportWriter  # noqa: E402
+
+
+def parse_args(argv):
+    argv = argv[argv.index("--") + 1:] if "--" in argv else []
+    parser = argparse.ArgumentParser(
+            prog="blender --background --python batch.py --",
+            description="Validate the meshes of .blend files")
+    parser.add_argument("files", nargs="*", help=".blend files to validate")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(),
+                        help="number of worker Blender processes")
+    parser.add_argument("-o", "--output",
+                        default="model_validator_report.json",
+                        help="path of the json report")
+    parser.add_argument("--flagged",
+                        help="path of the .jsonl or .csv report of the "
+                             "indices of the flagged elements")
+    parser.add_argument("--blender", default=bpy.app.binary_path,
+                        help="Blender executable used by the workers")
+    parser.add_argument("--worker", action="store_true",
+                        help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def validate_objects(writer=None):
+    """
+    Counts of every checker, for each mesh object of the open file
+    :param writer: ReportWriter the flagged elements are streamed to
+    """
+    report = []
+    for obj in bpy.data.objects:
+        if obj.type != 'MESH':
+            continue
+        analysis = MeshAnalysis(obj.data)
+        verts, edges, faces, tris = analysis.counts
+        if writer is not None:
+            writer.write_object(obj.name, obj.data.name, analysis.counts,
+                                analysis.results.items())
+        report.append({"object": obj.name,
+                       "mesh": obj.data.name,
+                       "verts": verts,
+                       "edges": edges,
+                       "faces": faces,
+                       "tris": tris,
+                       "checkers": analysis.checker_counts()})
+    return report
+
+
+def run_worker(output, flagged=None):
+    if flagged is None:
+        objects = validate_objects()
+    else:
+        with open(flagged, "w", newline="") as file:
+            objects = validate_objects(ReportWriter(
+                    file, ReportWriter.path_format(flagged), header=False))
+
+    report = {"file": bpy.data.filepath, "objects": objects}
+    with open(output, "w") as file:
+        json.dump(report, file)
+
+
+def validate_file(blender, path, output, flagged=None):
+    """Validate path in a worker Blender process, and return its report"""
+    command = [blender, "--background", "--factory-startup", path,
+               "--python-exit-code", "1",
+               "--python", os.path.abspath(__file__),
+               "--", "--worker", "--output", output]
+    if flagged is not None:
+        command += ["--flagged", flagged]
+    process = subprocess.run(command, capture_output=True, text=True)
+    if process.returncode != 0 or not os.path.exists(output):
+        error = process.stderr.strip() or \
+            f"exit code {process.returncode}"
+        return {"file": path, "error": error}
+
+    with open(output) as file:
+        return json.load(file)
+
+
+def merge_flagged(path, parts):
+    """Concatenate the flagged reports of the workers, a block at a time"""
+    with open(path, "w", newline="") as file:
+        ReportWriter(file, ReportWriter.path_format(path))
+        for part in parts:
+            if os.path.exists(part):
+                with open(part, newline="") as part_file:
+                    shutil.copyfileobj(part_file, file)
+
+
+def run(args):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        outputs = [os.path.join(tmp_dir, f"{i}.json")
+                   for i in range(len(args.files))]
+        parts = [None] * len(args.files)
+        if args.flagged is not None:
+            ext = os.path.splitext(args.flagged)[1]
+            parts = [os.path.join(tmp_dir, f"{i}{ext}")
+                     for i in range(len(args.files))]
+        with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+            reports = list(pool.map(
+                    lambda path, output, part: validate_file(
+                            args.blender, path, output, part),
+                    args.files, outputs, parts))
+
+        if args.flagged is not None:
+            merge_flagged(args.flagged, parts)
+
+    with open(args.output, "w") as file:
+        json.dump({"files": reports}, file, indent=2)
+
+    return int(any("error" in report for report in reports))
+
+
+def main():
+    args = parse_args(sys.argv)
+    if args.worker:
+        run_worker(args.output, args.flagged)
+    else:
+        sys.exit(run(args))
+
+
+if __name__ == "__main__":
+    main()
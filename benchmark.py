@@ -0,0 +1,283 @@
+"""
+Scaling benchmark of the checkers and of the overlay building:
+
+    blender --background --python benchmark.py -- [-o RESULTS] [options]
+
+Grid meshes of every --sizes faces count are generated with controlled
+ratios of triangles, ngons, poles and non manifold fins. For each of them
+the analysis, every checker's set_datas, the coordinate gathering and, when
+a GPU context is available, the batch building stages are timed in OBJECT
+and EDIT mode. Results are written as json, to compare versions.
+
+Jobs never run in --background, so the big EDIT mode meshes are validated
+synchronously, whatever the progressive_faces preference.
+"""
+
+import argparse
+import importlib
+import json
+import os
+import sys
+import time
+
+import addon_utils
+import bpy
+import numpy as np
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+PACKAGE = os.path.basename(PACKAGE_DIR)
+
+CHECKERS = ('non_manifold', 'triangles', 'ngons',
+            'n_poles', 'e_poles', 'more_poles', 'isolated_verts', 'doubles',
+            'intersections')
+POLES = ('n_poles', 'e_poles', 'more_poles', 'isolated_verts')
+
+
+def parse_args(argv):
+    argv = argv[argv.index("--") + 1:] if "--" in argv else []
+    parser = argparse.ArgumentParser(
+            prog="blender --background --python benchmark.py --",
+            description="Time the checkers on generated meshes")
+    parser.add_argument("-o", "--output",
+                        default="model_validator_benchmark.json",
+                        help="path of the json results")
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[10_000, 100_000, 1_000_000, 10_000_000],
+                        help="faces count of the generated meshes")
+    parser.add_argument("--modes", nargs="+", default=["OBJECT", "EDIT"],
+                        choices=["OBJECT", "EDIT"])
+    parser.add_argument("--triangles", type=float, default=0.1,
+                        help="ratio of quads split in triangles")
+    parser.add_argument("--ngons", type=float, default=0.05,
+                        help="ratio of quads merged in hexagons")
+    parser.add_argument("--poles", type=float, default=0.02,
+                        help="ratio of pairs of quads split in three quads "
+                             "around an N pole, adding two N poles and two "
+                             "E poles")
+    parser.add_argument("--non-manifold", type=float, default=0.01,
+                        help="ratio of edges with an extra fin face")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="number of runs of every stage")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+
+def grid_mesh(name, faces, triangles, ngons, poles, non_manifold, seed):
+    """
+    Grid of about faces faces, made of horizontal pairs of cells that are
+    either two quads, four triangles, one hexagon, or three quads around a
+    vert added in the middle of their shared edge. Fin triangles are then
+    added on random bottom edges of the cells to make them non manifold.
+    """
+    rng = np.random.default_rng(seed)
+    size_y = max(1, int(faces ** 0.5))
+    size_x = max(2, faces // size_y) // 2 * 2
+
+    xs, ys = np.meshgrid(np.arange(size_x + 1, dtype=np.float32),
+                         np.arange(size_y + 1, dtype=np.float32))
+    co = np.column_stack((xs.ravel(), ys.ravel(),
+                          np.zeros(xs.size, dtype=np.float32)))
+
+    # corners of the pairs of cells
+    px, py = np.meshgrid(np.arange(0, size_x, 2), np.arange(size_y))
+    a0 = (py * (size_x + 1) + px).ravel().astype(np.int32)
+    b0 = a0 + 1
+    b1 = a0 + 2
+    c1 = b1 + size_x + 1
+    c0 = b0 + size_x + 1
+    d0 = a0 + size_x + 1
+
+    kind = rng.random(len(a0))
+    is_tris = kind < triangles
+    is_ngon = (kind >= triangles) & (kind < triangles + ngons)
+    is_pole = (kind >= triangles + ngons) & \
+        (kind < triangles + ngons + poles)
+    is_quad = ~(is_tris | is_ngon | is_pole)
+
+    quads = np.concatenate((
+            np.column_stack((a0, b0, c0, d0))[is_quad],
+            np.column_stack((b0, b1, c1, c0))[is_quad]))
+    tris = np.concatenate((
+            np.column_stack((a0, b0, c0))[is_tris],
+            np.column_stack((a0, c0, d0))[is_tris],
+            np.column_stack((b0, b1, c1))[is_tris],
+            np.column_stack((b0, c1, c0))[is_tris]))
+    hexagons = np.column_stack((a0, b0, b1, c1, c0, d0))[is_ngon]
+
+    # the middle vert is an N pole, and so is c0, which loses its edge to
+    # b0, while d0 and c1 get an extra edge and become E poles
+    middles = np.arange(len(co), len(co) + np.count_nonzero(is_pole),
+                        dtype=np.int32)
+    co = np.concatenate((co, (co[b0[is_pole]] + co[c0[is_pole]]) / 2))
+    fans = np.concatenate((
+            np.column_stack((a0[is_pole], b0[is_pole], middles, d0[is_pole])),
+            np.column_stack((b0[is_pole], b1[is_pole], c1[is_pole], middles)),
+            np.column_stack((middles, c1[is_pole], c0[is_pole], d0[is_pole]))))
+
+    # bottom edges of the first row are already boundaries
+    candidates = np.flatnonzero(py.ravel() > 0)
+    fins_count = min(int(len(a0) * 2 * non_manifold), len(candidates))
+    fins_edges = rng.choice(candidates, size=fins_count, replace=False)
+    fins_verts = np.arange(len(co), len(co) + len(fins_edges),
+                           dtype=np.int32)
+    fins = np.column_stack((a0[fins_edges], b0[fins_edges], fins_verts))
+    fins_co = (co[a0[fins_edges]] + co[b0[fins_edges]]) / 2
+    fins_co[:, 2] = 1.0
+    co = np.concatenate((co, fins_co))
+
+    polygons = (quads, tris, hexagons, fans, fins)
+    loops = np.concatenate([polygon.ravel() for polygon in polygons])
+    loop_total = np.concatenate([np.full(len(polygon), polygon.shape[1],
+                                         dtype=np.int32)
+                                 for polygon in polygons])
+    loop_start = np.concatenate(([0], np.cumsum(loop_total)[:-1]))
+
+    mesh = bpy.data.meshes.new(name)
+    mesh.vertices.add(len(co))
+    mesh.vertices.foreach_set("co", co.astype(np.float32).ravel())
+    mesh.loops.add(len(loops))
+    mesh.loops.foreach_set("vertex_index", loops.astype(np.int32))
+    mesh.polygons.add(len(loop_total))
+    mesh.polygons.foreach_set("loop_start", loop_start.astype(np.int32))
+    if not mesh.polygons.bl_rna.properties['loop_total'].is_readonly:
+        mesh.polygons.foreach_set("loop_total", loop_total)
+    mesh.update(calc_edges=True)
+    return mesh
+
+
+def timed(function, repeat, setup=None):
+    """
+    Result of the last call of function, and its timings in seconds
+    :param setup: function called before every call, untimed
+    """
+    timings = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - start)
+    return result, {"min": min(timings),
+                    "mean": sum(timings) / len(timings)}
+
+
+def invalidate(mc_object):
+    """
+    Drop the results the spatial checkers reuse while the coordinates are
+    unchanged, so that every run searches again.
+    """
+    mc_object._doubles._co = None
+    mc_object._intersections._key = None
+
+
+def run_mode(addon, obj, mode, repeat):
+    """Timings of every stage for obj in mode"""
+    model_validator = addon.model_validator
+    checkers_props = bpy.context.window_manager.model_validator_props
+    for check in CHECKERS:
+        setattr(checkers_props, check, False)
+
+    bpy.context.view_layer.objects.active = obj
+    bpy.ops.object.mode_set(mode=mode)
+    results = []
+
+    mc_object, timings = timed(
+            lambda: model_validator.ModelValidatorObject(obj), repeat)
+    results.append({"stage": "init", "checker": None, **timings})
+
+    for check in CHECKERS:
+        setattr(checkers_props, check, True)
+        checker = mc_object._poles if check in POLES else \
+            getattr(mc_object, f"_{check}")
+        _, timings = timed(checker.set_datas, repeat,
+                           lambda: invalidate(mc_object))
+        count = checker.count(check) if check in POLES else checker.count
+        results.append({"stage": "set_datas", "checker": check,
+                        "flagged": count, **timings})
+
+        def gather():
+            if check in POLES:
+                return checker.get_poles(0.1, check)
+            if check == 'doubles':
+                return checker.get_points(0.1)
+            if check == 'non_manifold':
+                return checker.get_edges(0.1)
+            return checker.get_faces(0.1), checker.get_edges(0.1)
+
+        # the buffers are dropped before every run, so that they are
+        # gathered again rather than read from the previous run
+        _, timings = timed(gather, repeat, checker.refresh)
+        results.append({"stage": "coordinates", "checker": check,
+                        **timings})
+
+    if not bpy.app.background:
+        gpu = model_validator.ModelValidatorGPU
+        items = [(mc_object, obj.matrix_world)]
+        for check in CHECKERS:
+            primitives = gpu.primitives(check)
+
+            def build_merged():
+                gpu.clear_batches()
+                for primitive in primitives:
+                    gpu.merged_batch(check, primitive, items)
+
+            def build_local():
+                gpu.clear_batches()
+                for primitive in primitives:
+                    gpu.local_batches(mc_object, check, primitive)
+
+            for stage, build in (("merged_batches", build_merged),
+                                 ("local_batches", build_local)):
+                _, timings = timed(build, repeat)
+                results.append({"stage": stage, "checker": check,
+                                **timings})
+        gpu.clear_batches()
+
+    # a full revalidation, with all checkers fused in update_datas
+    _, timings = timed(lambda: mc_object.update_datas(
+            mc_object.set_bm_object()), repeat, lambda: invalidate(mc_object))
+    results.append({"stage": "update_datas", "checker": None, **timings})
+
+    bpy.ops.object.mode_set(mode='OBJECT')
+    for result in results:
+        result["mode"] = mode
+    return results
+
+
+def main():
+    args = parse_args(sys.argv)
+
+    sys.path.insert(0, os.path.dirname(PACKAGE_DIR))
+    addon_utils.enable(PACKAGE, default_set=True)
+    addon = importlib.import_module(PACKAGE)
+    addon_prefs = bpy.context.preferences.addons[PACKAGE].preferences
+    addon_prefs.use_result_cache = False
+    # time the synchronous validation, jobs being stepped by timers only
+    addon_prefs.progressive_faces = 2 ** 31 - 1
+
+    results = []
+    for faces in args.sizes:
+        mesh = grid_mesh(f"benchmark_{faces}", faces, args.triangles,
+                         args.ngons, args.poles, args.non_manifold,
+                         args.seed)
+        obj = bpy.data.objects.new(mesh.name, mesh)
+        bpy.context.scene.collection.objects.link(obj)
+        for mode in args.modes:
+            for result in run_mode(addon, obj, mode, args.repeat):
+                results.append({"faces": len(mesh.polygons), **result})
+        bpy.data.objects.remove(obj)
+        bpy.data.meshes.remove(mesh)
+
+    report = {"blender": bpy.app.version_string,
+              "version": ".".join(map(str, addon.bl_info["version"])),
+              "mix": {"triangles": args.triangles,
+                      "ngons": args.ngons,
+                      "poles": args.poles,
+                      "non_manifold": args.non_manifold},
+              "results": results}
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+import hashlib
+import os
+import tempfile
+import time
+import zipfile
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+__all__ = ['ResultCache']
+
+
+class ResultCache:
+    """
+    On disk cache of the results of MeshAnalysis, keyed by a hash of the
+    mesh arrays they are derived from. Every entry is a npz file of int32
+    index arrays, and the least recently used entries are evicted once the
+    cache gets bigger than max_size bytes.
+    """
+
+    EXTENSION = ".npz"
+    TEMPORARY = ".tmp"
+    # bumped when the checkers or the layout of the entries change, so
+    # that entries of older versions are never loaded
+    VERSION = 2
+    # seconds after which a temporary file is left by a failed save,
+    # rather than being written by another thread
+    STALE_TIME = 3600
+
+    def __init__(self, directory, max_size):
+        self._directory = directory
+        self._max_size = max_size
+
+    @staticmethod
+    def key(arrays):
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{ResultCache.VERSION}".encode())
+        for array in arrays:
+            digest.update(str(array.shape).encode())
+            digest.update(np.ascontiguousarray(array).data)
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self._directory, key + self.EXTENSION)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            # evicted by another thread meanwhile
+            return False
+        return True
+
+    def load(self, key):
+        """Cached results of key, or None"""
+        path = self._path(key)
+        try:
+            with np.load(path) as datas:
+                results = {check: datas[check] for check in datas.files}
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, EOFError, zipfile.BadZipFile):
+            # a corrupt entry would never be replaced otherwise
+            self._remove(path)
+            return None
+
+        # the modification time orders the entries for the eviction
+        try:
+            os.utime(path)
+        except OSError:
+            # evicted by another thread meanwhile
+            pass
+        return results
+
+    def save(self, key, results):
+        temporary = None
+        try:
+            os.makedirs(self._directory, exist_ok=True)
+            with tempfile.NamedTemporaryFile(dir=self._directory,
+                                             suffix=self.TEMPORARY,
+                                             delete=False) as file:
+                temporary = file.name
+                np.savez(file, **results)
+            os.replace(temporary, self._path(key))
+        except OSError:
+            if temporary is not None:
+                self._remove(temporary)
+            return
+
+        self.evict()
+
+    def evict(self):
+        """
+        Remove the least recently used entries above max_size, and the
+        temporary files left by failed saves.
+        """
+        entries = []
+        stale = time.time() - self.STALE_TIME
+        with os.scandir(self._directory) as scan:
+            for entry in scan:
+                if not entry.name.endswith((self.EXTENSION,
+                                            self.TEMPORARY)):
+                    continue
+                # entries may be evicted by another thread meanwhile
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                if entry.name.endswith(self.TEMPORARY):
+                    if stat.st_mtime < stale:
+                        self._remove(entry.path)
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        size = sum(entry[1] for entry in entries)
+        for _mtime, entry_size, path in sorted(entries):
+            if size <= self._max_size:
+                break
+            if self._remove(path):
+                size -= entry_size
@@ -1,172 +1,1274 @@
+import sys
+import time
 
+from array import array
+from itertools import chain, islice
 
-import bmesh
+from mathutils import Vector
+from mathutils.bvhtree import BVHTree
+from mathutils.kdtree import KDTree
+from mathutils.geometry import tessellate_polygon
 
-__all__ = ['Triangles', 'Ngons', 'NonManifold', 'Poles']
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
+__all__ = ['Triangles', 'Ngons', 'NonManifold', 'Poles', 'Doubles',
+           'Intersections', 'scan_elements', 'scan_bmesh', 'dirty_region',
+           'ValidationJob', 'gather_verts', 'world_coords', 'world_buffers', 'normal_scale', 'normal_offset', 'nbytes',
+           'selection_scope']
 
-def _triangulate_polygon(bm, polygons_idx):
-    bm_copy = bm.copy()
 
-    bm_copy.faces.ensure_lookup_table()
-    polygons = [bm_copy.faces[idx] for idx in polygons_idx]
+# tuple of three floats, the vert buffers items without numpy
+_COORD_BYTES = sys.getsizeof((0.0, 0.0, 0.0)) + 3 * sys.getsizeof(0.0)
 
-    new_faces = bmesh.ops.triangulate(bm_copy, faces=polygons,
-                                      quad_method="BEAUTY",
-                                      ngon_method="BEAUTY")
-    verts_idx = [vert.index for face in new_faces['faces'] for vert in
-                 face.verts]
-    bm_copy.free()
-    del bm_copy
-    bm.verts.ensure_lookup_table()
-    verts = [bm.verts[idx] for idx in verts_idx]
-    return verts
+
+def nbytes(*datas):
+    """
+    Approximate bytes taken by index arrays and vert buffers: numpy arrays,
+    array('i'), or sequences of coordinates without numpy. None is skipped.
+    """
+    total = 0
+    for data in datas:
+        if data is None:
+            continue
+        if isinstance(data, array):
+            total += data.itemsize * len(data)
+        elif hasattr(data, 'nbytes'):
+            total += data.nbytes
+        else:
+            total += sys.getsizeof(data) + len(data) * _COORD_BYTES
+    return total
+
+
+def _gather_verts(verts):
+    """
+    Pack the local coordinates and normals of verts into two contiguous
+    float32 arrays of shape (len(verts), 3).
+    """
+    if np is None:
+        return (tuple([vert.co[:] for vert in verts]),
+                tuple([vert.normal[:] for vert in verts]))
+
+    count = len(verts)
+    co = np.fromiter(chain.from_iterable(vert.co for vert in verts),
+                     dtype=np.float32, count=count * 3)
+    no = np.fromiter(chain.from_iterable(vert.normal for vert in verts),
+                     dtype=np.float32, count=count * 3)
+    return co.reshape(count, 3), no.reshape(count, 3)
+
+
+def _world_coords(matrix, co, no, offset):
+    """
+    Transform the packed local coordinates by the world matrix and push
+    them along their normals, in a single batched operation.
+    """
+    wm = np.array(matrix, dtype=np.float32)
+    coords = co @ wm[:3, :3].T
+    coords += wm[:3, 3]
+    coords += no * offset
+    return coords
+
+
+def _world_coords_fallback(matrix, co, no, offset):
+    """Per vertex path, used when numpy is not available."""
+    return tuple([((matrix @ Vector(vert_co)) + Vector(vert_no) * offset)[:]
+                  for vert_co, vert_no in zip(co, no)])
+
+
+def normal_scale(matrix):
+    """
+    Distance the verts are pushed along their normals by an offset of one
+    percent, for the world matrix of an object or instance.
+    """
+    return sum(matrix.to_scale()) / 3 / 100
+
+
+def normal_offset(matrix, offset):
+    """
+    Distance the verts are pushed along their normals, for an offset in
+    percents of the scale of the world matrix of an object or instance.
+    :param matrix: world matrix, or None for normals already scaled by
+    normal_scale, see world_buffers
+    """
+    scale = 1.0 if matrix is None else normal_scale(matrix)
+    return max(0.1, offset) * scale
+
+
+def world_buffers(matrix, co, no):
+    """
+    World coordinates of local coordinates, and their normals scaled by
+    normal_scale, so that buffers of several world matrices are offset by
+    the same normal_offset(None, offset).
+    """
+    scale = normal_scale(matrix)
+    if np is None:
+        return (tuple([(matrix @ Vector(vert_co))[:] for vert_co in co]),
+                tuple([(Vector(vert_no) * scale)[:] for vert_no in no]))
+
+    wm = np.array(matrix, dtype=np.float32)
+    coords = co @ wm[:3, :3].T
+    coords += wm[:3, 3]
+    return coords, no * np.float32(scale)
+
+
+def world_coords(matrix, co, no, offset):
+    """
+    World coordinates of local coordinates and normals, for the world
+    matrix of an object or of an instance.
+    :param offset: offset along the normals, see normal_offset
+    """
+    offset = normal_offset(matrix, offset)
+    if np is None:
+        return _world_coords_fallback(matrix, co, no, offset)
+    return _world_coords(matrix, co, no, offset)
+
+
+def gather_verts(bm_verts, indices):
+    """
+    Local coordinates and normals of the verts of bm_verts at indices, each
+    vert being read once however many times it is indexed.
+    """
+    bm_verts.ensure_lookup_table()
+    if np is None:
+        return _gather_verts([bm_verts[i] for i in indices.tolist()])
+
+    verts, inverse = np.unique(indices, return_inverse=True)
+    co, no = _gather_verts([bm_verts[i] for i in verts.tolist()])
+    return co[inverse], no[inverse]
+
+
+def _join_buffers(parts):
+    """
+    Buffers of the concatenated parts of vert buffers, see gather_verts,
+    the triangles indices of face buffers being shifted into them.
+    """
+    if len(parts) == 1:
+        return parts[0]
+
+    if np is None:
+        joined = [tuple(chain.from_iterable(part[i] for part in parts))
+                  for i in (0, 1)]
+    else:
+        joined = [np.concatenate([part[i] for part in parts])
+                  for i in (0, 1)]
+    if len(parts[0]) == 3:
+        starts = [0]
+        for part in parts[:-1]:
+            starts.append(starts[-1] + len(part[0]))
+        if np is None:
+            joined.append([tuple(i + start for i in tri)
+                           for part, start in zip(parts, starts)
+                           for tri in part[2]])
+        else:
+            joined.append(np.concatenate([
+                    part[2] + start for part, start in zip(parts, starts)]))
+    return tuple(joined)
+
+
+def _add_part(parts, part):
+    """
+    Append the buffers of part to parts, joining the last parts as long as
+    they are not bigger than the one after them, so that extending buffers
+    many times only leaves a logarithmic number of parts.
+    """
+    parts.append(part)
+    while len(parts) > 1 and len(parts[-2][0]) <= len(parts[-1][0]):
+        parts[-2:] = [_join_buffers(parts[-2:])]
+
+
+def _indices(values=()):
+    """Compact int32 array of the indices of the iterable values"""
+    if np is None:
+        return array('i', values)
+    return np.fromiter(values, dtype=np.int32)
+
+
+def _concatenate(*arrays):
+    if np is None:
+        return array('i', chain.from_iterable(arrays))
+    return np.concatenate(arrays)
+
+
+def _replace_indices(indices, region, flagged):
+    """
+    Sorted indices without those of region, and with those of flagged.
+    """
+    if np is None:
+        region = set(region)
+        kept = {index for index in indices if index not in region}
+        return array('i', sorted(kept.union(flagged)))
+
+    kept = indices[~np.isin(indices, region)]
+    return np.union1d(kept, flagged).astype(np.int32)
+
+
+def _index_bmesh(bm):
+    """Checkers keep element indices, so they have to be up to date"""
+    bm.verts.index_update()
+    bm.edges.index_update()
+    bm.faces.index_update()
+
+
+def scan_elements(faces, edges, verts, checkers, tri_offsets=False):
+    """
+    Visit faces, edges and verts at most once each, classifying every
+    element for all the checkers at the same time.
+    :param checkers: iterable of 'triangles', 'ngons', 'non_manifold' and
+    'poles'
+    :param tri_offsets: pair every ngon with the index of its first loop
+    triangle, loop triangles coming in the order of the faces, sides - 2
+    per face
+    :return: dict of the flagged elements of each checker
+    """
+    results = {}
+    triangles = []
+    ngons = []
+    if 'triangles' in checkers or 'ngons' in checkers:
+        tris = 0
+        for face in faces:
+            sides = len(face.edges)
+            if sides == 3:
+                triangles.append(face)
+            elif sides > 4:
+                ngons.append((face, tris) if tri_offsets else face)
+            tris += sides - 2
+
+    if 'triangles' in checkers:
+        results['triangles'] = triangles
+    if 'ngons' in checkers:
+        results['ngons'] = ngons
+
+    if 'non_manifold' in checkers:
+        results['non_manifold'] = [edge for edge in edges
+                                   if not edge.is_manifold]
+
+    if 'poles' in checkers:
+        poles = results['poles'] = {check: set() for check in Poles.CHECKERS}
+        for vert in verts:
+            pole_type = len(vert.link_edges)
+            if pole_type == 0:
+                poles['isolated_verts'].add(vert)
+            elif pole_type == 3:
+                poles['n_poles'].add(vert)
+            elif pole_type == 5:
+                poles['e_poles'].add(vert)
+            elif pole_type > 5:
+                poles['more_poles'].add(vert)
+
+    return results
+
+
+def scan_bmesh(bm, checkers):
+    """
+    Classify the whole bmesh in a single pass, see scan_elements, the
+    ngons being paired with the offset of their loop triangles.
+    """
+    _index_bmesh(bm)
+    return scan_elements(bm.faces, bm.edges, bm.verts, checkers,
+                         tri_offsets=True)
+
+
+def dirty_region(bm):
+    """
+    Elements whose checker results may have changed after an edit: the
+    selected verts, the faces and edges using them, and the verts and
+    edges of those faces. Only the region is classified again, but
+    finding it still costs a pass over the whole bmesh: index_update of
+    every element, in C, and a Python walk over every vert for the
+    selection, about 0.1s per million verts.
+    """
+    _index_bmesh(bm)
+    verts = {vert for vert in bm.verts if vert.select}
+    faces = {face for vert in verts for face in vert.link_faces}
+    edges = {edge for vert in verts for edge in vert.link_edges}
+    edges.update(edge for face in faces for edge in face.edges)
+    verts.update(vert for edge in edges for vert in edge.verts)
+    return faces, edges, verts
+
+
+def selection_scope(bm, rings=0):
+    """
+    Elements validated in the selection scoped mode: the selected verts
+    grown by rings of verts linked by an edge, and the edges and faces
+    whose verts are all in the scope. Only finding the selected verts
+    visits the whole bmesh.
+    """
+    _index_bmesh(bm)
+    verts = {vert for vert in bm.verts if vert.select}
+    ring = verts
+    for _ in range(rings):
+        ring = {edge.other_vert(vert) for vert in ring
+                for edge in vert.link_edges} - verts
+        verts |= ring
+    edges = {edge for vert in verts for edge in vert.link_edges
+             if edge.other_vert(vert) in verts}
+    faces = {face for vert in verts for face in vert.link_faces
+             if all(face_vert in verts for face_vert in face.verts)}
+    return faces, edges, verts
+
+
+class ValidationJob:
+    """
+    Resumable validation of a bmesh. Every step runs chunks of the
+    scan_bmesh of the classifying checkers, and of the searches of the
+    spatial checkers, until its time budget is spent, and adds the flagged
+    elements to the results of the checkers, so that they can be drawn
+    progressively.
+    """
+
+    CHUNK_SIZE = 5000
+
+    def __init__(self, bm, checkers, targets):
+        """
+        :param checkers: checkers to run, see scan_elements, and spatial
+        checkers, whose targets have build_steps
+        :param targets: dict of the checker instance of each checker
+        """
+        _index_bmesh(bm)
+        self._bm = bm
+        self.checkers = list(checkers)
+        self._checkers = [check for check in checkers
+                          if not hasattr(targets[check], 'build_steps')]
+        self._targets = targets
+        self._tasks = []
+        self._total = 0
+        self._processed = 0
+        # only counted when the faces are scanned
+        self.tris = None
+
+        if self._checkers:
+            # faces are always scanned, for the triangles count
+            sequences = ['faces']
+            if 'non_manifold' in checkers:
+                sequences.append('edges')
+            if 'poles' in checkers:
+                sequences.append('verts')
+            self._total += sum(len(getattr(bm, sequence))
+                               for sequence in sequences)
+            self._tasks.append(self._scan(sequences))
+            self.tris = 0
+
+            empty = scan_elements((), (), (), self._checkers)
+            for check, result in empty.items():
+                targets[check].set_results(result)
+
+        for check in checkers:
+            if check not in self._checkers:
+                self._total += targets[check].build_size(bm)
+                self._tasks.append(
+                        targets[check].build_steps(bm, self.CHUNK_SIZE))
+
+    def _scan(self, sequences):
+        """Generator scanning a chunk per step, see step"""
+        for sequence in sequences:
+            # slicing a sequence walks it from its start, so chunks are
+            # taken from a single iterator instead
+            iterator = iter(getattr(self._bm, sequence))
+            while True:
+                chunk = list(islice(iterator, self.CHUNK_SIZE))
+                if not chunk:
+                    break
+
+                elements = {'faces': (), 'edges': (), 'verts': ()}
+                elements[sequence] = chunk
+                if sequence == 'faces':
+                    self.tris += sum(len(face.edges) - 2 for face in chunk)
+                results = scan_elements(elements['faces'],
+                                        elements['edges'],
+                                        elements['verts'], self._checkers)
+                for check, result in results.items():
+                    self._targets[check].extend_results(result)
+                yield len(chunk)
+
+    @property
+    def done(self):
+        return not self._tasks
+
+    @property
+    def progress(self):
+        return self._processed / self._total if self._total else 1.0
+
+    def step(self, budget):
+        """
+        Process chunks for about budget seconds.
+        :return: True once all the elements have been processed
+        """
+        if not self._bm.is_valid:
+            self._tasks.clear()
+            return True
+
+        start = time.perf_counter()
+        while self._tasks:
+            try:
+                self._processed += next(self._tasks[0])
+            except StopIteration:
+                self._tasks.pop(0)
+                continue
+            if time.perf_counter() - start > budget:
+                break
+
+        return self.done
+
+
+def _face_edges(verts):
+    """Verts of the edges of the face of verts, two per edge."""
+    return chain.from_iterable(zip(verts, verts[1:] + verts[:1]))
 
 
 class MainGeo:
+    """
+    Flagged faces, stored as int32 arrays of indices: the faces, their
+    number of sides and of triangles, the verts of their triangles, three
+    per triangle, and the verts of their edges, two per edge, in the faces
+    order. Their buffers are lists of parts, see get_face_parts.
+    """
+
+    __slots__ = ('_parent', '_faces', '_sides', '_tri_counts', '_tris',
+                 '_edges', '_face_parts', '_edge_parts', '_version')
+
     def __init__(self, parent):
         self._parent = parent
-        self._count = 0
-        self._verts = []
-        self._indices = []
-        self._edges = []
+        self._faces = _indices()
+        self._sides = _indices()
+        # degenerate ngons may have less than sides - 2 triangles
+        self._tri_counts = _indices()
+        self._tris = _indices()
+        self._edges = _indices()
+        self._face_parts = None
+        self._edge_parts = None
+        self._version = 0
 
     @property
     def count(self):
-        return self._count
+        return len(self._faces)
+
+    @property
+    def indices(self):
+        return self._faces
+
+    @property
+    def memory(self):
+        return nbytes(self._faces, self._sides, self._tri_counts,
+                      self._tris, self._edges,
+                      *chain.from_iterable(self._face_parts or ()),
+                      *chain.from_iterable(self._edge_parts or ()))
+
+    @property
+    def version(self):
+        return self._version
+
+    def _set_analysis_datas(self, datas):
+        """Fill the results from the face datas of a MeshAnalysis."""
+        self._faces, self._sides, self._tri_counts, self._tris, \
+            self._edges = datas
+        self.refresh()
+
+    def _records(self, faces):
+        """
+        Index, verts and triangles verts of faces, the triangulate method
+        of the subclasses returning the vert indices of the triangles of a
+        face, three per triangle.
+        """
+        return [(face.index, [vert.index for vert in face.verts],
+                 self.triangulate(face)) for face in faces]
+
+    def _append(self, records):
+        self._faces = _concatenate(self._faces,
+                                   _indices(record[0] for record in records))
+        self._sides = _concatenate(
+                self._sides, _indices(len(record[1]) for record in records))
+        self._tri_counts = _concatenate(
+                self._tri_counts,
+                _indices(len(record[2]) // 3 for record in records))
+        self._tris = _concatenate(self._tris, _indices(
+                chain.from_iterable(record[2] for record in records)))
+        self._edges = _concatenate(self._edges, _indices(
+                chain.from_iterable(_face_edges(record[1])
+                                    for record in records)))
+
+    def _remove(self, faces):
+        """Drop the results of the faces of index faces."""
+        if np is None:
+            faces = set(faces)
+            tris = iter(self._tris)
+            edges = iter(self._edges)
+            kept = []
+            for face, sides, count in zip(self._faces, self._sides,
+                                          self._tri_counts):
+                record = (face, sides, count,
+                          [next(tris) for _ in range(count * 3)],
+                          [next(edges) for _ in range(sides * 2)])
+                if face not in faces:
+                    kept.append(record)
+            self._faces = array('i', [record[0] for record in kept])
+            self._sides = array('i', [record[1] for record in kept])
+            self._tri_counts = array('i', [record[2] for record in kept])
+            self._tris = array('i', chain.from_iterable(
+                    record[3] for record in kept))
+            self._edges = array('i', chain.from_iterable(
+                    record[4] for record in kept))
+            return
+
+        kept = ~np.isin(self._faces, faces)
+        self._tris = self._tris[np.repeat(kept, self._tri_counts * 3)]
+        self._edges = self._edges[np.repeat(kept, self._sides * 2)]
+        self._faces = self._faces[kept]
+        self._sides = self._sides[kept]
+        self._tri_counts = self._tri_counts[kept]
+
+    def set_results(self, faces):
+        """Fill the results from the faces found by scan_bmesh."""
+        self._faces = self._sides = self._tri_counts = self._tris = \
+            self._edges = _indices()
+        self._append(self._records(faces))
+        self.refresh()
+
+    def update_results(self, region, faces):
+        """
+        Replace the results of the faces in region only.
+        :param region: faces that have been revalidated
+        :param faces: flagged faces of region
+        """
+        self._remove(_indices(face.index for face in region))
+        self._append(self._records(faces))
+        self.refresh()
+
+    def extend_results(self, faces):
+        """
+        Add flagged faces, found in a chunk not scanned before. Gathered
+        buffers get a part of the new faces only, see get_face_parts.
+        """
+        if not faces:
+            return
+        tris = len(self._tris)
+        edges = len(self._edges)
+        self._append(self._records(faces))
+        if self._face_parts is not None:
+            _add_part(self._face_parts, self._face_part(self._tris[tris:]))
+        if self._edge_parts is not None:
+            _add_part(self._edge_parts,
+                      self._parent.vert_buffers(self._edges[edges:]))
+        self._version += 1
+
+    def refresh(self):
+        """Gather the coordinates again, after verts have moved."""
+        self._face_parts = None
+        self._edge_parts = None
+        self._version += 1
+
+    def _face_part(self, tris):
+        """Buffers of the verts of tris, see get_face_buffers"""
+        if np is None:
+            co, no = self._parent.vert_buffers(tris)
+            indices = [(i, i + 1, i + 2) for i in range(0, len(tris), 3)]
+        else:
+            verts, indices = np.unique(tris, return_inverse=True)
+            co, no = self._parent.vert_buffers(verts)
+            indices = indices.astype(np.int32).reshape(-1, 3)
+        return co, no, indices
+
+    def get_face_parts(self):
+        """
+        Face buffers, see get_face_buffers, split in the part gathered at
+        once and the parts added by extend_results since, so that a
+        ValidationJob only gathers the faces it flags, see _add_part.
+        """
+        if self._face_parts is None:
+            self._face_parts = [self._face_part(self._tris)]
+        return self._face_parts
+
+    def get_face_buffers(self):
+        """
+        Local coordinates and normals of the verts of the flagged faces,
+        and the indices of their triangles into them.
+        """
+        parts = self.get_face_parts()
+        if len(parts) > 1:
+            parts = self._face_parts = [_join_buffers(parts)]
+        return parts[0]
+
+    def get_edge_parts(self):
+        """Edge buffers, split in parts, see get_face_parts."""
+        if self._edge_parts is None:
+            self._edge_parts = [self._parent.vert_buffers(self._edges)]
+        return self._edge_parts
+
+    def get_edge_buffers(self):
+        """Local coordinates and normals of the flagged edges."""
+        parts = self.get_edge_parts()
+        if len(parts) > 1:
+            parts = self._edge_parts = [_join_buffers(parts)]
+        return parts[0]
 
     def get_faces(self, offset):
-        obj = self._parent._object
-        wm = obj.matrix_world
-        scale = sum(obj.scale[:]) / 3
-        _offset = max(0.1, offset + 0.01) / 100 * scale
-        coords = tuple([
-            ((wm @ vert.co)[0] + vert.normal.x * _offset,
-             (wm @ vert.co)[1] + vert.normal.y * _offset,
-             (wm @ vert.co)[2] + vert.normal.z * _offset)
-            for vert in self._verts]
-                )
-        return coords, self._indices
+        co, no, indices = self.get_face_buffers()
+        return world_coords(self._parent._object.matrix_world, co, no,
+                            offset + 0.01), indices
 
     def get_edges(self, offset):
-        obj = self._parent._object
-        wm = obj.matrix_world
-        scale = sum(obj.scale[:]) / 3
-        _offset = max(0.1, offset) / 100 * scale
-        coords = tuple([
-            ((wm @ vert.co)[0] + vert.normal.x * _offset,
-                (wm @ vert.co)[1] + vert.normal.y * _offset,
-                (wm @ vert.co)[2] + vert.normal.z * _offset) for edge in
-            self._edges for vert in edge.verts])
-        return coords
+        return world_coords(self._parent._object.matrix_world,
+                            *self.get_edge_buffers(), offset)
 
 
 class Triangles(MainGeo):
+
+    __slots__ = ()
+
     def __init__(self, parent):
         MainGeo.__init__(self, parent)
 
     def set_datas(self):
-        bm = self._parent.bm_object
-        self._verts.clear()
-        self._indices.clear()
-        self._edges.clear()
+        analysis = self._parent.analysis
+        if analysis is not None:
+            self._set_analysis_datas(analysis.checker_datas('triangles'))
+            return
 
-        faces = [face for face in bm.faces if len(face.edges) == 3]
-        self._count = len(faces)
+        self.set_results(scan_bmesh(self._parent.bm_object,
+                                    ('triangles',))['triangles'])
 
-        self._verts = [vert for face in faces for vert in face.verts]
-        vert_count = len(self._verts)
-        index = list(range(vert_count))
-        self._indices = [index[i:i+3] for i in range(0, vert_count, 3)]
-        self._edges = [edge for face in faces for edge in face.edges]
+    def triangulate(self, face):
+        return [vert.index for vert in face.verts]
 
 
 class Ngons(MainGeo):
+
+    __slots__ = ()
+
     def __init__(self, parent):
         MainGeo.__init__(self, parent)
 
     def set_datas(self):
-        bm = self._parent.bm_object
-        self._verts.clear()
-        self._indices.clear()
-        self._edges.clear()
+        analysis = self._parent.analysis
+        if analysis is not None:
+            self._set_analysis_datas(analysis.checker_datas('ngons'))
+            return
+
+        self.set_results(scan_bmesh(self._parent.bm_object,
+                                    ('ngons',))['ngons'])
 
-        faces = [face for face in bm.faces if len(face.edges) > 4]
-        self._count = len(faces)
+    def triangulate(self, face):
+        verts = face.verts[:]
+        return [verts[i].index for tri in tessellate_polygon(
+                [[vert.co for vert in verts]]) for i in tri]
 
-        self._verts = _triangulate_polygon(bm, list(map(lambda face:
-                                                        face.index, faces)))
-        vert_count = len(self._verts)
-        index = list(range(vert_count))
-        self._indices = [index[i:i + 3] for i in range(0, vert_count, 3)]
-        self._edges = [edge for face in faces for edge in face.edges]
+    def set_results(self, ngons):
+        """
+        Fill the results from the ngons found by scan_bmesh, slicing their
+        loop triangles out of those of the bmesh at their offsets.
+        """
+        looptris = self._parent.looptris if ngons else ()
+        records = []
+        for face, offset in ngons:
+            verts = [vert.index for vert in face.verts]
+            records.append((face.index, verts, [
+                    loop.vert.index for looptri in
+                    looptris[offset:offset + len(verts) - 2]
+                    for loop in looptri]))
+
+        self._faces = self._sides = self._tri_counts = self._tris = \
+            self._edges = _indices()
+        self._append(records)
+        self.refresh()
 
 
 class NonManifold:
+    """Sorted int32 array of the indices of the non manifold edges."""
+
+    __slots__ = ('_parent', '_edges', '_edge_parts', '_version')
+
     def __init__(self, parent):
         self._parent = parent
-        self._edges = []
+        self._edges = _indices()
+        self._edge_parts = None
+        self._version = 0
 
     @property
     def count(self):
         return len(self._edges)
+
+    @property
+    def indices(self):
+        return self._edges
+
+    @property
+    def memory(self):
+        return nbytes(self._edges,
+                      *chain.from_iterable(self._edge_parts or ()))
+
+    @property
+    def version(self):
+        return self._version
+
     def set_datas(self):
-        bm = self._parent.bm_object
-        self._edges.clear()
-        self._edges = [edge for edge in bm.edges if not edge.is_manifold]
+        analysis = self._parent.analysis
+        if analysis is not None:
+            self._edges = analysis.non_manifold()
+            self.refresh()
+            return
+
+        self.set_results(scan_bmesh(self._parent.bm_object,
+                                    ('non_manifold',))['non_manifold'])
+
+    def set_results(self, edges):
+        """Fill the results from the edges found by scan_bmesh."""
+        self._edges = _indices(edge.index for edge in edges)
+        self.refresh()
+
+    def update_results(self, region, edges):
+        """Replace the results of the edges in region only."""
+        self._edges = _replace_indices(
+                self._edges, _indices(edge.index for edge in region),
+                _indices(edge.index for edge in edges))
+        self.refresh()
+
+    def extend_results(self, edges):
+        """Add flagged edges, see MainGeo.extend_results."""
+        if not edges:
+            return
+        edges = _indices(edge.index for edge in edges)
+        self._edges = _concatenate(self._edges, edges)
+        if self._edge_parts is not None:
+            _add_part(self._edge_parts, self._parent.vert_buffers(
+                    self._parent.edges_verts(edges)))
+        self._version += 1
+
+    def refresh(self):
+        self._edge_parts = None
+        self._version += 1
+
+    def get_edge_parts(self):
+        """Edge buffers, split in parts, see MainGeo.get_face_parts."""
+        if self._edge_parts is None:
+            self._edge_parts = [self._parent.vert_buffers(
+                    self._parent.edges_verts(self._edges))]
+        return self._edge_parts
+
+    def get_edge_buffers(self):
+        """Local coordinates and normals of the non manifold edges."""
+        parts = self.get_edge_parts()
+        if len(parts) > 1:
+            parts = self._edge_parts = [_join_buffers(parts)]
+        return parts[0]
 
     def get_edges(self, offset):
-        obj = self._parent._object
-        wm = obj.matrix_world
-        scale = sum(obj.scale[:]) / 3
-        _offset = max(0.1, offset) / 100 * scale
-        coords = tuple([
-            ((wm @ vert.co)[0] + vert.normal.x * _offset,
-                (wm @ vert.co)[1] + vert.normal.y * _offset,
-                (wm @ vert.co)[2] + vert.normal.z * _offset) for edge in
-            self._edges for vert in edge.verts])
-        return coords
+        return world_coords(self._parent._object.matrix_world,
+                            *self.get_edge_buffers(), offset)
 
 
 class Poles:
+    """Sorted int32 arrays of the indices of the verts of every pole type."""
+
+    CHECKERS = ('n_poles', 'e_poles', 'more_poles', 'isolated_verts')
+
+    __slots__ = ('_parent', '_e_poles', '_n_poles', '_more_poles',
+                 '_isolated_verts', '_buffers', '_version')
+
     def __init__(self, parent):
         self._parent = parent
-        self._e_poles = set()
-        self._n_poles = set()
-        self._more_poles = set()
-        self._isolated_verts = set()
+        self._e_poles = _indices()
+        self._n_poles = _indices()
+        self._more_poles = _indices()
+        self._isolated_verts = _indices()
+        self._buffers = {}
+        self._version = 0
 
     def count(self, pole_type):
         return len(getattr(self, f"_{pole_type}"))
 
+    def indices(self, pole_type):
+        return getattr(self, f"_{pole_type}")
+
+    @property
+    def memory(self):
+        return nbytes(*(getattr(self, f"_{check}") for check in self.CHECKERS),
+                      *chain.from_iterable(chain.from_iterable(
+                              self._buffers.values())))
+
+    @property
+    def version(self):
+        return self._version
+
     def set_datas(self):
-        bm = self._parent.bm_object
-        checkers = ('n_poles', 'e_poles', 'more_poles', 'isolated_verts')
-        for check in checkers:
-            exec(f"self._{check}.clear()")
+        analysis = self._parent.analysis
+        if analysis is not None:
+            for check in self.CHECKERS:
+                setattr(self, f"_{check}", analysis.poles(check))
+            self.refresh()
+            return
 
-        for vert in bm.verts:
-            pole_type = len(vert.link_edges)
-            if pole_type == 0:
-                self._isolated_verts.add(vert)
-            if pole_type == 3:
-                self._n_poles.add(vert)
-            if pole_type == 5:
-                self._e_poles.add(vert)
-            if pole_type > 5:
-                self._more_poles.add(vert)
+        self.set_results(scan_bmesh(self._parent.bm_object,
+                                    ('poles',))['poles'])
+
+    def set_results(self, poles):
+        """Fill the results from the verts found by scan_bmesh."""
+        for check in self.CHECKERS:
+            setattr(self, f"_{check}",
+                    _indices(sorted(vert.index for vert in poles[check])))
+        self.refresh()
+
+    def update_results(self, region, poles):
+        """Replace the results of the verts in region only."""
+        region = _indices(vert.index for vert in region)
+        for check in self.CHECKERS:
+            setattr(self, f"_{check}", _replace_indices(
+                    getattr(self, f"_{check}"), region,
+                    _indices(vert.index for vert in poles[check])))
+        self.refresh()
+
+    def extend_results(self, poles):
+        """Add flagged verts, see MainGeo.extend_results."""
+        if not any(poles.values()):
+            return
+        for check in self.CHECKERS:
+            verts = _indices(sorted(vert.index for vert in poles[check]))
+            setattr(self, f"_{check}", _concatenate(
+                    getattr(self, f"_{check}"), verts))
+            parts = self._buffers.get(check)
+            if parts is not None and len(verts):
+                _add_part(parts, self._parent.vert_buffers(verts))
+        self._version += 1
+
+    def refresh(self):
+        self._buffers.clear()
+        self._version += 1
+
+    def get_pole_parts(self, pole_type):
+        """
+        Buffers of pole_type, split in parts, see MainGeo.get_face_parts.
+        """
+        parts = self._buffers.get(pole_type)
+        if parts is None:
+            parts = self._buffers[pole_type] = [self._parent.vert_buffers(
+                    getattr(self, f"_{pole_type}"))]
+        return parts
+
+    def get_pole_buffers(self, pole_type):
+        """Local coordinates and normals of the verts of pole_type."""
+        parts = self.get_pole_parts(pole_type)
+        if len(parts) > 1:
+            parts = self._buffers[pole_type] = [_join_buffers(parts)]
+        return parts[0]
 
     def get_poles(self, offset, pole_type):
-        obj = self._parent._object
-        scale = sum(obj.scale[:])/3
-        wm = obj.matrix_world
-        verts = getattr(self, f"_{pole_type}")
-        _offset = max(0.1, offset) / 100 * scale
-        coords = tuple([
-            ((wm @ vert.co)[0] + vert.normal.x * _offset,
-             (wm @ vert.co)[1] + vert.normal.y * _offset,
-             (wm @ vert.co)[2] + vert.normal.z * _offset)
-            for vert in verts]
-                )
-
-        return coords
+        return world_coords(self._parent._object.matrix_world,
+                            *self.get_pole_buffers(pole_type), offset)
+
+
+class Doubles:
+    """
+    Sorted int32 array of the indices of the verts closer than the doubles
+    distance to another vert. In OBJECT mode, the search is skipped as long
+    as the verts coordinates and the distance have not changed. In EDIT
+    mode, a KDTree of the last full search is kept, and only the verts
+    moved since, and the verts close to them, are searched again, until
+    they are too many and the tree is built again.
+    """
+
+    REBUILD_RATIO = 0.1
+
+    __slots__ = ('_parent', '_verts', '_co', '_distance', '_buffers',
+                 '_version', '_tree', '_moved', '_moved_tree')
+
+    def __init__(self, parent):
+        self._parent = parent
+        self._verts = _indices()
+        self._co = None
+        self._distance = None
+        self._buffers = None
+        self._version = 0
+        self._tree = None
+        # current coordinates of the verts moved since the tree was built
+        self._moved = {}
+        self._moved_tree = None
+
+    @property
+    def count(self):
+        return len(self._verts)
+
+    @property
+    def indices(self):
+        return self._verts
+
+    @property
+    def memory(self):
+        # the coordinates of an analysis are counted with it
+        co = self._co if self._parent.analysis is None else None
+        return nbytes(self._verts, co,
+                      *chain.from_iterable(self._buffers or ())) + \
+            len(self._moved) * _COORD_BYTES
+
+    @property
+    def version(self):
+        return self._version
+
+    def _is_cached(self, co, distance):
+        if self._co is None or distance != self._distance:
+            return False
+        if np is None:
+            return co == self._co
+        return np.array_equal(co, self._co)
+
+    def set_datas(self):
+        analysis = self._parent.analysis
+        if analysis is None:
+            bm = self._parent.bm_object
+            for _count in self.build_steps(bm, len(bm.verts) + 1):
+                pass
+            return
+
+        co = analysis.co
+        distance = self._parent.doubles_distance
+        if self._is_cached(co, distance):
+            return
+
+        self._tree = None
+        self._co = co
+        self._distance = distance
+        self._verts = analysis.doubles(distance)
+        self.refresh()
+
+    @staticmethod
+    def build_size(bm):
+        """Number of steps of the search, counted by build_steps"""
+        return len(bm.verts) * 2
+
+    def build_steps(self, bm, chunk_size):
+        """
+        Drop the results, and return a generator searching the doubles of
+        bm a chunk of verts at a time, see ValidationJob. It yields the
+        number of steps done.
+        """
+        self._tree = None
+        self._co = None
+        self._moved = {}
+        self._moved_tree = None
+        self._verts = _indices()
+        self.refresh()
+        return self._build(bm, chunk_size)
+
+    def _build(self, bm, chunk_size):
+        distance = self._parent.doubles_distance
+        tree = KDTree(len(bm.verts))
+        co = []
+        iterator = iter(bm.verts)
+        while True:
+            chunk = list(islice(iterator, chunk_size))
+            if not chunk:
+                break
+            for vert in chunk:
+                tree.insert(vert.co, vert.index)
+            co.append(_gather_verts(chunk)[0])
+            yield len(chunk)
+        tree.balance()
+
+        co = tuple(chain.from_iterable(co)) if np is None else \
+            np.concatenate(co) if co else np.zeros((0, 3), dtype=np.float32)
+        flagged = []
+        for start in range(0, len(co), chunk_size):
+            chunk = range(start, min(start + chunk_size, len(co)))
+            flagged.extend(index for index in chunk
+                           if len(tree.find_range(co[index], distance)) > 1)
+            yield len(chunk)
+
+        self._tree = tree
+        self._co = co
+        self._distance = distance
+        self._verts = _indices(flagged)
+        self.refresh()
+
+    def _position(self, index):
+        """Current coordinates of the vert of index"""
+        co = self._moved.get(index)
+        if co is None:
+            co = Vector(self._co[index])
+        return co
+
+    def _near(self, co):
+        """Indices of the verts closer than the distance to co"""
+        near = {index for _co, index, _distance in
+                self._tree.find_range(co, self._distance)
+                if index not in self._moved}
+        if self._moved_tree is not None:
+            near.update(index for _co, index, _distance in
+                        self._moved_tree.find_range(co, self._distance))
+        return near
+
+    def update_region(self, faces, verts):
+        """
+        Search again the verts of the last edited region that have moved,
+        and the verts close to their previous and current coordinates.
+        :param verts: verts of the last edited region
+        :return: False when a full search is needed instead, as when the
+        edit may have moved verts out of the region
+        """
+        if self._tree is None or \
+                self._distance != self._parent.doubles_distance or \
+                self._parent.moves_unselected():
+            return False
+
+        moved = {vert.index: vert.co.copy() for vert in verts
+                 if vert.co != self._position(vert.index)}
+        if not moved:
+            return True
+        if len(self._moved.keys() | moved.keys()) > \
+                len(self._co) * self.REBUILD_RATIO:
+            return False
+
+        # verts close to the previous and to the current coordinates
+        region = set(moved)
+        for index in moved:
+            region.update(self._near(self._position(index)))
+        self._moved.update(moved)
+        self._moved_tree = KDTree(len(self._moved))
+        for index, co in self._moved.items():
+            self._moved_tree.insert(co, index)
+        self._moved_tree.balance()
+        for co in moved.values():
+            region.update(self._near(co))
+
+        flagged = [index for index in region
+                   if len(self._near(self._position(index))) > 1]
+        self._verts = _replace_indices(self._verts, _indices(region),
+                                       _indices(flagged))
+        self.refresh()
+        return True
+
+    def refresh(self):
+        self._buffers = None
+        self._version += 1
+
+    def get_point_parts(self):
+        """
+        Buffers of the doubles, in a single part as they are only found
+        once the search is over, see MainGeo.get_face_parts.
+        """
+        if self._buffers is None:
+            self._buffers = [self._parent.vert_buffers(self._verts)]
+        return self._buffers
+
+    def get_point_buffers(self):
+        """Local coordinates and normals of the doubles."""
+        return self.get_point_parts()[0]
+
+    def get_points(self, offset):
+        return world_coords(self._parent._object.matrix_world,
+                            *self.get_point_buffers(), offset)
+
+
+def _face_centers(faces):
+    """Median centers of faces, as a float32 array or tuples"""
+    if np is None:
+        return [face.calc_center_median()[:] for face in faces]
+    return np.fromiter(
+            chain.from_iterable(face.calc_center_median() for face in faces),
+            dtype=np.float32, count=len(faces) * 3).reshape(-1, 3)
+
+
+def _grid_order(centers, cells):
+    """
+    Indices of the concatenated chunks of centers, sorted by the cells of
+    a grid of cells per axis over their bounds.
+    """
+    if np is None:
+        centers = list(chain.from_iterable(centers))
+        if not centers:
+            return []
+        low = [min(co[axis] for co in centers) for axis in range(3)]
+        sizes = [(max(co[axis] for co in centers) - low[axis]) / cells or 1.0
+                 for axis in range(3)]
+        return sorted(range(len(centers)), key=lambda i: tuple(
+                int((centers[i][axis] - low[axis]) / sizes[axis])
+                for axis in range(3)))
+
+    if not centers:
+        return []
+    centers = np.concatenate(centers)
+    low = centers.min(axis=0)
+    sizes = (centers.max(axis=0) - low) / cells
+    sizes[sizes == 0] = 1.0
+    cell = np.minimum(((centers - low) / sizes).astype(np.int64), cells - 1)
+    keys = (cell[:, 0] * cells + cell[:, 1]) * cells + cell[:, 2]
+    return np.argsort(keys, kind='stable').tolist()
+
+
+def _polygons_tree(faces):
+    """BVHTree of faces, indexed in the order of faces"""
+    verts = list({vert for face in faces for vert in face.verts})
+    local = {vert: i for i, vert in enumerate(verts)}
+    return BVHTree.FromPolygons(
+            [vert.co for vert in verts],
+            [[local[vert] for vert in face.verts] for face in faces])
+
+
+def _intersect(face, other):
+    """
+    Whether face and other, found overlapping in different trees, really
+    intersect. The overlap of different trees reports faces touching at a
+    shared vert, so the faces sharing verts are tested again in a tree of
+    their own, whose self overlap ignores them as for the faces of a
+    single tree.
+    """
+    if set(face.verts).isdisjoint(other.verts):
+        return True
+    tree = _polygons_tree((face, other))
+    return any(a != b for a, b in tree.overlap(tree))
+
+
+class Intersections(MainGeo):
+    """
+    Faces intersecting other faces of the mesh, found by the self overlap
+    of a BVHTree. In EDIT mode the trees of the last full build are kept,
+    and only the faces edited since are tested again, against them, until
+    they are too many and the trees are built again. Big bmeshes are built
+    by a ValidationJob, in trees of chunks of faces sorted in space.
+    """
+
+    REBUILD_RATIO = 0.1
+
+    __slots__ = ('_trees', '_pairs', '_stale', '_key')
+
+    def __init__(self, parent):
+        MainGeo.__init__(self, parent)
+        # trees of the last build, with the face index of each of their
+        # polygons, or None for a tree of the whole bmesh
+        self._trees = []
+        # intersecting pairs of the trees, and faces edited since the build
+        self._pairs = set()
+        self._stale = set()
+        self._key = None
+
+    triangulate = Ngons.triangulate
+
+    def _set_analysis_intersections(self, analysis):
+        if self._key is not None and \
+                np.array_equal(analysis.co, self._key[0]) and \
+                np.array_equal(analysis.looptris, self._key[1]):
+            return
+
+        self._key = (analysis.co, analysis.looptris)
+        tree = BVHTree.FromPolygons(analysis.co.tolist(),
+                                    analysis.looptris.tolist(),
+                                    all_triangles=True)
+        pairs = np.array(tree.overlap(tree), dtype=np.int32).reshape(-1, 2)
+        pairs = analysis.looptri_faces[pairs]
+        faces_mask = np.zeros(len(analysis.loop_total), dtype=bool)
+        faces_mask[pairs[pairs[:, 0] != pairs[:, 1]].ravel()] = True
+        self._set_analysis_datas(analysis.face_datas(faces_mask))
+
+    def set_datas(self):
+        analysis = self._parent.analysis
+        self._trees = []
+        if analysis is not None:
+            self._set_analysis_intersections(analysis)
+            return
+
+        self._key = None
+        bm = self._parent.bm_object
+        _index_bmesh(bm)
+        tree = BVHTree.FromBMesh(bm)
+        self._trees = [(tree, None)]
+        self._pairs = {pair for pair in tree.overlap(tree)
+                       if pair[0] != pair[1]}
+        self._stale = set()
+
+        bm.faces.ensure_lookup_table()
+        self.set_results([bm.faces[i] for i in
+                          sorted({i for pair in self._pairs for i in pair})])
+
+    @staticmethod
+    def build_size(bm):
+        """Number of steps of the build, counted by build_steps"""
+        return len(bm.faces) * 3
+
+    def build_steps(self, bm, chunk_size):
+        """
+        Drop the results, and return a generator building the trees of bm
+        and their overlaps a chunk of faces at a time, see ValidationJob.
+        It yields the number of steps done.
+        """
+        self._trees = []
+        self._pairs = set()
+        self._stale = set()
+        self._key = None
+        self.set_results(())
+        return self._build(bm, chunk_size)
+
+    def _build(self, bm, chunk_size):
+        bm.faces.ensure_lookup_table()
+        centers = []
+        iterator = iter(bm.faces)
+        while True:
+            chunk = list(islice(iterator, chunk_size))
+            if not chunk:
+                break
+            centers.append(_face_centers(chunk))
+            yield len(chunk)
+
+        # faces sorted by the cells of a grid of about one chunk per cell,
+        # so that the tree of a chunk only overlaps its neighbours
+        cells = max(1, round((len(bm.faces) / chunk_size) ** (1 / 3)))
+        order = _grid_order(centers, cells)
+
+        trees = []
+        for start in range(0, len(order), chunk_size):
+            faces = order[start:start + chunk_size]
+            trees.append((_polygons_tree([bm.faces[i] for i in faces]),
+                          faces))
+            yield len(faces)
+
+        pairs = set()
+        for position, (tree, faces) in enumerate(trees):
+            pairs.update((faces[a], faces[b]) for a, b in tree.overlap(tree)
+                         if a != b)
+            for other, other_faces in trees[position + 1:]:
+                for a, b in tree.overlap(other):
+                    pair = (faces[a], other_faces[b])
+                    if _intersect(bm.faces[pair[0]], bm.faces[pair[1]]):
+                        pairs.add(pair)
+            yield len(faces)
+
+        self._trees = trees
+        self._pairs = pairs
+        self.set_results([bm.faces[i] for i in
+                          sorted({i for pair in pairs for i in pair})])
+
+    def update_region(self, faces, verts):
+        """
+        Test the faces edited since the trees were built against each
+        other, and against the unedited faces of the trees.
+        :param faces: faces of the last edited region
+        :return: False when a full build is needed instead, as when the
+        edit may have moved faces out of the region
+        """
+        if self._parent.moves_unselected():
+            return False
+        bm = self._parent.bm_object
+        self._stale.update(face.index for face in faces)
+        if not self._trees or \
+                len(self._stale) > len(bm.faces) * self.REBUILD_RATIO:
+            return False
+
+        bm.faces.ensure_lookup_table()
+        stale = [bm.faces[i] for i in sorted(self._stale)]
+        tree = _polygons_tree(stale)
+
+        pairs = {(stale[a].index, stale[b].index)
+                 for a, b in tree.overlap(tree) if a != b}
+        for kept, indices in self._trees:
+            for a, b in tree.overlap(kept):
+                if indices is not None:
+                    b = indices[b]
+                if b not in self._stale and \
+                        _intersect(stale[a], bm.faces[b]):
+                    pairs.add((stale[a].index, b))
+        pairs.update(pair for pair in self._pairs
+                     if self._stale.isdisjoint(pair))
+
+        flagged = {i for pair in pairs for i in pair}
+        region = self._stale.union(flagged.symmetric_difference(
+                self._faces.tolist()))
+        self.update_results([bm.faces[i] for i in region],
+                            [bm.faces[i] for i in region if i in flagged])
+        return True
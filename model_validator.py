@@ -1,10 +1,87 @@
+import os
+import time
+
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+
 import bpy
 import bmesh
 import gpu
 
 from gpu_extras.batch import batch_for_shader
+from mathutils import Matrix
 
 from .core import *
+from .analysis import MeshAnalysis
+from .cache import ResultCache
+from .profiling import Profiler
+from .spatial import ChunkGrid
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def result_cache():
+    """ResultCache set in the add-on preferences, or None when disabled"""
+    addon_prefs = bpy.context.preferences.addons[
+        __name__.split(".")[0]].preferences
+    if not addon_prefs.use_result_cache:
+        return None
+
+    directory = bpy.path.abspath(addon_prefs.cache_directory) or \
+        os.path.join(bpy.utils.user_resource('CONFIG'), "model_validator")
+    return ResultCache(directory, addon_prefs.cache_size * 1024 ** 2)
+
+
+def use_evaluated():
+    """Whether the checkers validate the meshes evaluated by the modifiers"""
+    return bpy.context.window_manager.model_validator_props.evaluated
+
+
+class BMeshPool:
+    """
+    bmesh copies owned by the add-on, for the objects read without numpy.
+    Released bmeshes are cleared and kept for the next objects, up to SIZE
+    of them, the others being freed, and all of them on clear.
+    """
+
+    SIZE = 4
+    # approximate size of the bmesh structs, in bytes
+    ELEMENT_BYTES = {'verts': 64, 'edges': 88, 'faces': 64}
+    LOOP_BYTES = 64
+
+    _free = []
+
+    @classmethod
+    def acquire(cls):
+        return cls._free.pop() if cls._free else bmesh.new()
+
+    @classmethod
+    def release(cls, bm):
+        if not bm.is_valid:
+            return
+        if len(cls._free) < cls.SIZE:
+            bm.clear()
+            cls._free.append(bm)
+        else:
+            bm.free()
+
+    @classmethod
+    def clear(cls):
+        for bm in cls._free:
+            bm.free()
+        cls._free.clear()
+
+    @classmethod
+    def memory(cls, bm):
+        """Approximate bytes taken by the elements of bm"""
+        # most edges are used by two loops
+        return sum(len(getattr(bm, data)) * size
+                   for data, size in cls.ELEMENT_BYTES.items()) + \
+            len(bm.edges) * 2 * cls.LOOP_BYTES
 
 
 class ModelValidatorObject:
@@ -12,11 +89,31 @@ class ModelValidatorObject:
     MESH_DATAS = ('verts', 'edges', 'faces')
     GEO_CHECKER = ('non_manifold', 'triangles', 'ngons')
     VERTS_CHECKER = ('n_poles', 'e_poles', 'more_poles', 'isolated_verts')
+    # checkers comparing elements together, run apart from scan_bmesh
+    SPATIAL_CHECKER = ('doubles', 'intersections')
+    CHECKERS = ('triangles', 'ngons', 'non_manifold', 'poles') + \
+        SPATIAL_CHECKER
 
-    def __init__(self, obj):
+    def __init__(self, obj, deferred=False):
+        """
+        :param deferred: in OBJECT mode, only snapshot the mesh, the
+        analysis being left to ModelValidator.analyze
+        """
 
         self._object = obj
+        self.key = self.data_key(obj)
+        # objects sharing these datas, obj being the one they are read from
+        self.users = set()
         self._bm_object = None
+        # whether _bm_object comes from the BMeshPool, or is the edit bmesh
+        self._bm_owned = False
+        self._analysis = None
+        self._looptris = None
+        # faces, edges and verts validated in the selection scoped mode
+        self._scope = None
+        self._job = None
+        self._evaluated = False
+        self._analyzing = False
 
         self._verts = 0
         self._edges = 0
@@ -28,42 +125,422 @@ class ModelValidatorObject:
         self._non_manifold = NonManifold(self)
 
         self._poles = Poles(self)
+        self._doubles = Doubles(self)
+        self._intersections = Intersections(self)
 
-        self._init_object()
+        self._init_object(deferred)
 
-    def _init_object(self):
-        bm = self.set_bm_object()
-        self.update_datas(bm)
+    @staticmethod
+    def data_key(obj):
+        """
+        Objects using the same mesh share their datas, unless the meshes
+        evaluated with their own modifiers are validated.
+        """
+        return obj if use_evaluated() else obj.data
+
+    def add_user(self, obj):
+        self.users.add(obj)
+
+    def remove_user(self, obj):
+        self.users.discard(obj)
+        if obj is self._object and self.users:
+            self._object = next(iter(self.users))
+
+    def _init_object(self, deferred=False):
+        bm = self.set_bm_object(deferred)
+        if not self._analyzing:
+            self.update_datas(bm)
 
-    def set_bm_object(self):
+    def set_bm_object(self, deferred=False):
+        """
+        In EDIT mode, checkers read the edit bmesh. In OBJECT mode they use
+        a MeshAnalysis of the mesh, unless numpy is missing and a bmesh
+        copy is needed.
+        :param deferred: snapshot the MeshAnalysis without analyzing it
+        """
         me = self._object.data
-        if me.is_editmode:
+        self.release_bm_object()
+        self._analysis = None
+        self._analyzing = False
+        self._evaluated = use_evaluated()
+        if self._evaluated:
+            self.set_evaluated_object(deferred)
+        elif me.is_editmode:
             self._bm_object = bmesh.from_edit_mesh(me)
+        elif MeshAnalysis.available():
+            self._analysis = MeshAnalysis(me, result_cache(), deferred)
+            self._analyzing = deferred
         else:
-            bm = bmesh.new()
+            bm = self._bm_object = BMeshPool.acquire()
+            self._bm_owned = True
             bm.from_mesh(me)
-            self._bm_object = bm
         return self._bm_object
 
+    def set_evaluated_object(self, deferred=False):
+        """
+        Read the mesh evaluated with the modifiers of the object, in both
+        modes. It is evaluated once here, and again only when revalidated
+        after a geometry update of the object.
+        """
+        depsgraph = bpy.context.evaluated_depsgraph_get()
+        if MeshAnalysis.available():
+            obj_eval = self._object.evaluated_get(depsgraph)
+            me = obj_eval.to_mesh()
+            try:
+                self._analysis = MeshAnalysis(me, result_cache(), deferred)
+            finally:
+                obj_eval.to_mesh_clear()
+            self._analyzing = deferred
+        else:
+            bm = self._bm_object = BMeshPool.acquire()
+            self._bm_owned = True
+            bm.from_object(self._object, depsgraph)
+
     def update_datas(self, bm):
-        for data in self.MESH_DATAS:
-            setattr(self, f"_{data}", len(getattr(bm, data)))
-            self._tris = len(bm.calc_loop_triangles())
+        if bm is None:
+            self._verts, self._edges, self._faces, self._tris = \
+                self._analysis.counts
+        elif self.is_scoped():
+            for data in self.MESH_DATAS:
+                setattr(self, f"_{data}", len(getattr(bm, data)))
+            # unknown, counting them would triangulate the whole bmesh
+            self._tris = None
+            self.set_scope(bm)
+            self.update_spatial_checkers()
+            return
+        elif self.is_progressive(bm):
+            for data in self.MESH_DATAS:
+                setattr(self, f"_{data}", len(getattr(bm, data)))
+            self._job = None
+            self.start_job(bm, self.enabled_checkers())
+            return
+        else:
+            for data in self.MESH_DATAS:
+                setattr(self, f"_{data}", len(getattr(bm, data)))
+            self._looptris = bm.calc_loop_triangles()
+            self._tris = len(self._looptris)
 
-        model_validator = bpy.context.window_manager.model_validator_props
-        for check in self.GEO_CHECKER:
-            if getattr(model_validator, check):
-                exec(f"self._{check}.set_datas()")
+        self._job = None
+        if bm is None:
+            for check in self.scan_checkers():
+                with Profiler.measure(self.name, 'set_datas', check):
+                    getattr(self, f"_{check}").set_datas()
+        else:
+            # a single pass over the bmesh for all the enabled checkers
+            with Profiler.measure(self.name, 'set_datas', 'scan'):
+                results = scan_bmesh(bm, self.scan_checkers())
+            for check, result in results.items():
+                with Profiler.measure(self.name, 'set_datas', check):
+                    getattr(self, f"_{check}").set_results(result)
+        self.update_spatial_checkers()
 
+        # loop triangles are only kept while the checkers are updated
+        self._looptris = None
+
+    def enabled_checkers(self):
+        model_validator = bpy.context.window_manager.model_validator_props
+        checkers = [check for check in self.GEO_CHECKER
+                    if getattr(model_validator, check)]
         if any(getattr(model_validator, check) for check in self.VERTS_CHECKER):
-            self._poles.set_datas()
+            checkers.append('poles')
+        checkers.extend(check for check in self.SPATIAL_CHECKER
+                        if getattr(model_validator, check))
+        return checkers
+
+    def scan_checkers(self):
+        """Enabled checkers classifying elements one at a time"""
+        return [check for check in self.enabled_checkers()
+                if check not in self.SPATIAL_CHECKER]
+
+    def update_spatial_checkers(self, faces=None, verts=None):
+        """
+        :param faces: faces of the edited region, all the faces when None
+        :param verts: verts of the edited region
+        """
+        checkers = []
+        for check in self.enabled_checkers():
+            if check in self.SPATIAL_CHECKER:
+                if faces is not None:
+                    with Profiler.measure(self.name, 'set_datas', check):
+                        if getattr(self, f"_{check}").update_region(faces,
+                                                                    verts):
+                            continue
+                checkers.append(check)
+        self.validate_spatial(checkers)
+
+    def validate_spatial(self, checkers):
+        """
+        Run spatial checkers over the whole mesh, in a ValidationJob for
+        big edit bmeshes.
+        """
+        if not checkers:
+            return
+        if self._analysis is None and self.is_progressive(self.bm_object):
+            self.start_job(self.bm_object, checkers)
+            return
+        for check in checkers:
+            with Profiler.measure(self.name, 'set_datas', check):
+                getattr(self, f"_{check}").set_datas()
+
+    @property
+    def doubles_distance(self):
+        addon_prefs = bpy.context.preferences.addons[
+            __name__.split(".")[0]].preferences
+        return addon_prefs.doubles_distance
+
+    def moves_unselected(self):
+        """
+        Whether edits may move unselected verts, out of the dirty region:
+        with the proportional editing or the mirror options of the mesh.
+        """
+        if bpy.context.scene.tool_settings.use_proportional_edit:
+            return True
+        me = self._object.data
+        return any(getattr(me, f"use_mirror_{axis}", False)
+                   for axis in "xyz")
+
+    def is_scoped(self):
+        """Whether the checkers only validate the scope of the edit bmesh"""
+        model_validator = bpy.context.window_manager.model_validator_props
+        return model_validator.selection_scope and \
+            self._bm_object is not None and not self._bm_owned
+
+    @property
+    def scope(self):
+        return self._scope
+
+    def set_scope(self, bm):
+        """
+        Validate the selection of bm and its rings from scratch, the
+        results of the other elements being dropped.
+        """
+        model_validator = bpy.context.window_manager.model_validator_props
+        self._looptris = None
+        with Profiler.measure(self.name, 'set_datas', 'scope'):
+            self._scope = selection_scope(bm, model_validator.scope_rings)
+            checkers = self.scan_checkers()
+            empty = scan_elements((), (), (), checkers)
+            results = scan_elements(*self._scope, checkers)
+        for check, result in results.items():
+            with Profiler.measure(self.name, 'set_datas', check):
+                checker = getattr(self, f"_{check}")
+                checker.set_results(empty[check])
+                checker.extend_results(result)
+
+    @staticmethod
+    def is_progressive(bm):
+        """Whether bm is big enough to be validated by a ValidationJob"""
+        addon_prefs = bpy.context.preferences.addons[
+            __name__.split(".")[0]].preferences
+        return len(bm.faces) > addon_prefs.progressive_faces
+
+    @property
+    def job(self):
+        return self._job
+
+    @property
+    def progress(self):
+        if self._analyzing:
+            return 0.0
+        return 1.0 if self._job is None else self._job.progress
+
+    @property
+    def analyzing(self):
+        return self._analyzing
+
+    def commit_analysis(self, analysis):
+        """
+        Update the checkers from an analysis done by ModelValidator.analyze,
+        unless the object has been validated again meanwhile.
+        """
+        if analysis is not self._analysis or not self._analyzing:
+            return
+        self._analyzing = False
+        self.update_datas(None)
+
+    def start_job(self, bm, checkers):
+        """
+        Run checkers in a ValidationJob. A running job starts again, with
+        its own checkers as well.
+        """
+        if self._job is not None:
+            checkers = list(dict.fromkeys(self._job.checkers + checkers))
+        targets = {check: getattr(self, f"_{check}") for check in checkers}
+        self._job = ValidationJob(bm, checkers, targets)
+        ModelValidator.start_jobs()
+
+    def step_job(self, budget):
+        done = self._job.step(budget)
+        if self._job.tris is not None:
+            self._tris = self._job.tris
+        if done:
+            self._job = None
+
+    def validate_checker(self, check):
+        """
+        Run a single checker, progressively for big edit bmeshes, in which
+        case the running job, if any, starts again with the checker.
+        """
+        if self._analyzing:
+            # every enabled checker is run once analyzed
+            return
+        if check in self.SPATIAL_CHECKER:
+            self.validate_spatial([check])
+        elif self._scope is not None:
+            self.set_scope(self.bm_object)
+        elif self._analysis is None and self.is_progressive(self.bm_object):
+            self.start_job(self.bm_object, self.scan_checkers())
+        else:
+            getattr(self, f"_{check}").set_datas()
+
+    def revalidate(self):
+        """
+        Update the results after an edit of the edit bmesh. Edits that
+        removed elements may leave dangling references in the results, so
+        they need a full rescan, as well as the edits made while a job is
+        running, whose region may be scanned again by the job. Evaluated
+        meshes and analyses, which have no edit bmesh, are read again.
+        """
+        if self._evaluated or self._analysis is not None:
+            self.update_bm_object()
+            return
+
+        bm = self.bm_object
+        if self.is_updated_datas(bm) or self._job is not None:
+            self.update_datas(bm)
+        elif self._scope is not None:
+            if all(element.is_valid for elements in self._scope
+                   for element in elements):
+                # the scope is the selection, which the edit was limited to
+                self.update_elements(*self._scope)
+            else:
+                # edits like Rotate Edge replace elements of the scope
+                # without changing the counts
+                self.set_scope(bm)
+                self.update_spatial_checkers(self._scope[0], self._scope[2])
+        else:
+            self.update_region(bm)
+
+    def update_region(self, bm):
+        """
+        Revalidate only the dirty region of the edit bmesh, when an edit
+        didn't change the number of verts, edges and faces. Finding the
+        region is still linear in the size of the bmesh, see dirty_region,
+        and the edits changing the counts are validated from scratch.
+        """
+        self.update_elements(*dirty_region(bm))
+
+    def update_elements(self, faces, edges, verts):
+        """Replace the results of the faces, edges and verts only"""
+        region = {'triangles': faces, 'ngons': faces,
+                  'non_manifold': edges, 'poles': verts}
+        with Profiler.measure(self.name, 'set_datas', 'region'):
+            results = scan_elements(faces, edges, verts,
+                                    self.scan_checkers())
+        for check, result in results.items():
+            with Profiler.measure(self.name, 'set_datas', check):
+                getattr(self, f"_{check}").update_results(region[check],
+                                                          result)
+        self.update_spatial_checkers(faces, verts)
+
+    def report_checkers(self):
+        """Enabled checkers, with every pole type apart"""
+        model_validator = bpy.context.window_manager.model_validator_props
+        return [check for check in self.GEO_CHECKER + self.VERTS_CHECKER +
+                self.SPATIAL_CHECKER if getattr(model_validator, check)]
+
+    def flagged(self, check):
+        """Indices of the elements flagged by check"""
+        if check in self.VERTS_CHECKER:
+            return self._poles.indices(check)
+        return getattr(self, f"_{check}").indices
+
+    @property
+    def counts(self):
+        """
+        verts, edges, faces and triangles counts, the triangles count being
+        None in the selection scoped mode
+        """
+        return self._verts, self._edges, self._faces, self._tris
+
+    def vert_buffers(self, verts):
+        """Local coordinates and normals of the verts of index verts"""
+        if self._analysis is not None:
+            return self._analysis.vert_buffers(verts)
+        return gather_verts(self.bm_object.verts, verts)
+
+    def edges_verts(self, edges):
+        """Indices of the verts of the edges of index edges, two per edge"""
+        if self._analysis is not None:
+            return self._analysis.edges_verts(edges)
+
+        bm_edges = self.bm_object.edges
+        bm_edges.ensure_lookup_table()
+        return array('i', [vert.index for i in edges.tolist()
+                           for vert in bm_edges[i].verts])
+
+    def release_bm_object(self):
+        """Give the bmesh copy back to the pool, the edit bmesh is kept"""
+        # loop triangles and scope reference the elements of the bmesh
+        self._looptris = None
+        self._scope = None
+        if self._bm_owned:
+            BMeshPool.release(self._bm_object)
+        self._bm_object = None
+        self._bm_owned = False
+
+    def free(self):
+        """
+        Release everything held for the object once it is not tracked
+        anymore, rather than when the reference cycles with its checkers
+        are collected.
+        """
+        self.release_bm_object()
+        self._analysis = None
+        self._job = None
+        for check in self.CHECKERS:
+            setattr(self, f"_{check}", None)
+
+    @property
+    def checkers(self):
+        return [getattr(self, f"_{check}") for check in self.CHECKERS]
+
+    @property
+    def memory(self):
+        """
+        Approximate bytes held for the object: its analysis or bmesh copy,
+        and the results and buffers of its checkers.
+        """
+        memory = sum(checker.memory for checker in self.checkers)
+        if self._analysis is not None:
+            memory += self._analysis.memory
+        if self._bm_owned and self._bm_object.is_valid:
+            memory += BMeshPool.memory(self._bm_object)
+        if self._looptris is not None:
+            memory += nbytes(self._looptris)
+        return memory
+
+    @property
+    def name(self):
+        return self._object.name
 
     @property
     def bm_object(self):
-        if self._bm_object is None or not self._bm_object.is_valid:
+        if self._analysis is None and (self._bm_object is None or
+                                       not self._bm_object.is_valid):
             self.update_bm_object()
         return self._bm_object
 
+    @property
+    def analysis(self):
+        return self._analysis
+
+    @property
+    def looptris(self):
+        if self._looptris is None:
+            return self.bm_object.calc_loop_triangles()
+        return self._looptris
+
     def update_bm_object(self):
         bm = self.set_bm_object()
         self.update_datas(bm)
@@ -74,9 +551,135 @@ class ModelValidatorObject:
                     for data in self.MESH_DATAS])
 
 
+VERTEX_SHADER = """
+void main()
+{
+    vec4 world = ModelMatrix * vec4(pos, 1.0);
+    gl_Position = ViewProjectionMatrix * vec4(world.xyz + nor * offset, 1.0);
+}
+"""
+
+FRAGMENT_SHADER = """
+void main()
+{
+    fragColor = color;
+}
+"""
+
+
+def _create_shader():
+    """
+    Uniform color shader applying the object world matrix and the normal
+    offset on the GPU, so that checkers only upload local coordinates.
+    """
+    if hasattr(gpu.types, "GPUShaderCreateInfo"):
+        info = gpu.types.GPUShaderCreateInfo()
+        info.push_constant('MAT4', "ModelMatrix")
+        info.push_constant('MAT4', "ViewProjectionMatrix")
+        info.push_constant('FLOAT', "offset")
+        info.push_constant('VEC4', "color")
+        info.vertex_in(0, 'VEC3', "pos")
+        info.vertex_in(1, 'VEC3', "nor")
+        info.fragment_out(0, 'VEC4', "fragColor")
+        info.vertex_source(VERTEX_SHADER)
+        info.fragment_source(FRAGMENT_SHADER)
+        return gpu.shader.create_from_info(info)
+
+    vertex_header = ("uniform mat4 ModelMatrix;\n"
+                     "uniform mat4 ViewProjectionMatrix;\n"
+                     "uniform float offset;\n"
+                     "in vec3 pos;\n"
+                     "in vec3 nor;\n")
+    fragment_header = ("uniform vec4 color;\n"
+                       "out vec4 fragColor;\n")
+    return gpu.types.GPUShader(vertex_header + VERTEX_SHADER,
+                               fragment_header + FRAGMENT_SHADER)
+
+
+class ChunkedBatch:
+    """
+    Overlay batch split in the chunks of a ChunkGrid. Only the chunks in
+    the view are drawn, and when they have more elements than the draw
+    budget, every chunk is drawn with one element out of a power of two.
+    The batch of a chunk is built the first time it is drawn at a stride.
+    Without numpy, it is a single batch drawn as a whole.
+    """
+
+    SIZES = {'POINTS': 1, 'LINES': 2, 'TRIS': 3}
+
+    def __init__(self, shader, primitive, co, no, indices=None):
+        self._shader = shader
+        self._primitive = primitive
+        self._no = no
+        self._batches = {}
+        if np is None:
+            self._grid = None
+            self._batches[None] = batch_for_shader(
+                    shader, primitive, {"pos": co, "nor": no},
+                    indices=indices)
+            return
+
+        if indices is None:
+            indices = np.arange(len(co), dtype=np.int32).reshape(
+                    -1, self.SIZES[primitive])
+        self._grid = ChunkGrid(co, indices)
+
+    def batch(self, chunk, stride):
+        batch = self._batches.get((chunk, stride))
+        if batch is not None:
+            return batch
+
+        elements = self._grid.chunk(chunk, stride)
+        if self._primitive == 'TRIS':
+            verts, indices = np.unique(elements, return_inverse=True)
+            indices = indices.astype(np.int32).reshape(-1, 3)
+        else:
+            verts, indices = elements.ravel(), None
+        batch = self._batches[(chunk, stride)] = batch_for_shader(
+                self._shader, self._primitive,
+                {"pos": self._grid.co[verts], "nor": self._no[verts]},
+                indices=indices)
+        return batch
+
+    def draw(self, matrix, margin, budget):
+        """
+        :param matrix: matrix from the local coordinates to the clip space
+        :param margin: distance the verts are pushed along their normals
+        :param budget: number of elements drawn at full detail
+        """
+        if self._grid is None:
+            self._batches[None].draw(self._shader)
+            return
+
+        chunks = self._grid.visible(np.array(matrix, dtype=np.float32),
+                                    margin)
+        count = self._grid.count(chunks)
+        stride = 1
+        while count > budget * stride:
+            stride *= 2
+        for chunk in chunks:
+            self.batch(chunk, stride).draw(self._shader)
+
+
 class ModelValidatorGPU:
+    """
+    The flagged elements of the static objects and of the instances are
+    merged in world space, in one batch per checker and primitive. The
+    objects moved or edited within SETTLE_TIME are drawn from batches of
+    their local coordinates instead, with their own world matrix, so that
+    the merged batches are not built again every frame of a transform.
+    """
+
+    # seconds an object stays unchanged before being merged again
+    SETTLE_TIME = 0.5
 
     _handler = None
+    _shader = None
+    # local batches of the datas, and merged batches of the checkers
+    _batches = {}
+    _merged = {}
+    # state of every tracked object, and time of its last change
+    _changes = {}
 
     @classmethod
     def setup_handler(cls):
@@ -87,34 +690,263 @@ class ModelValidatorGPU:
     @classmethod
     def remove_handler(cls):
         bpy.types.SpaceView3D.draw_handler_remove(cls._handler, 'WINDOW')
+        cls.clear_batches()
+
+    @classmethod
+    def shader(cls):
+        if cls._shader is None:
+            cls._shader = _create_shader()
+        return cls._shader
+
+    @classmethod
+    def clear_batches(cls, mc_object=None):
+        """
+        Drop the cached batches of mc_object and the merged batches it
+        contributes to, or every cached batch when mc_object is None.
+        """
+        if mc_object is None:
+            cls._batches.clear()
+            cls._merged.clear()
+            cls._changes.clear()
+            return
+
+        for key in [key for key in cls._batches if key[0] is mc_object]:
+            del cls._batches[key]
+        for key, (version, _batch) in list(cls._merged.items()):
+            if any(entry[0] is mc_object for entry in version[1:]):
+                del cls._merged[key]
 
     @staticmethod
-    def draw_edges(coords, line_width, color):
-        shader = gpu.shader.from_builtin('UNIFORM_COLOR')  # Fixed shader type
-        batch = batch_for_shader(shader, 'LINES', {"pos": coords})
-        shader.bind()
-        shader.uniform_float("color", color)
-        gpu.state.blend_set("ALPHA")
-        gpu.state.line_width_set(line_width)
-        batch.draw(shader)
+    def get_batch(batches, key, version, builder):
+        """
+        Return the batch cached under key in batches, building it again
+        with builder only when the version of its datas has changed since.
+        """
+        cached = batches.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        batch = builder()
+        batches[key] = (version, batch)
+        return batch
 
     @staticmethod
-    def draw_faces(coords, indices, color):
-        shader = gpu.shader.from_builtin('UNIFORM_COLOR')  # Fixed shader type
-        batch = batch_for_shader(shader, 'TRIS', {"pos": coords}, indices=indices)
-        shader.bind()
-        shader.uniform_float("color", color)
-        gpu.state.blend_set("ALPHA")
-        batch.draw(shader)
+    def primitives(check):
+        """Primitives the flagged elements of check are drawn with"""
+        if check in Poles.CHECKERS or check == 'doubles':
+            return ('POINTS',)
+        if check == 'non_manifold':
+            return ('LINES',)
+        return ('LINES', 'TRIS')
 
     @staticmethod
-    def draw_points(coords, point_size, color):
-        shader = gpu.shader.from_builtin('UNIFORM_COLOR')  # Fixed shader type
-        batch = batch_for_shader(shader, 'POINTS', {"pos": coords})
+    def checker(mc_object, check):
+        if check in Poles.CHECKERS:
+            return mc_object._poles
+        return getattr(mc_object, f"_{check}")
+
+    @classmethod
+    def buffers(cls, mc_object, check, primitive):
+        """
+        Local coordinates and normals of the flagged elements of check, and
+        the triangles indices for 'TRIS'.
+        """
+        checker = cls.checker(mc_object, check)
+        if check in Poles.CHECKERS:
+            return checker.get_pole_buffers(check)
+        if primitive == 'POINTS':
+            return checker.get_point_buffers()
+        if primitive == 'LINES':
+            return checker.get_edge_buffers()
+        return checker.get_face_buffers()
+
+    @classmethod
+    def parts(cls, mc_object, check, primitive):
+        """Buffers of check split in parts, see MainGeo.get_face_parts"""
+        checker = cls.checker(mc_object, check)
+        if check in Poles.CHECKERS:
+            return checker.get_pole_parts(check)
+        if primitive == 'POINTS':
+            return checker.get_point_parts()
+        if primitive == 'LINES':
+            return checker.get_edge_parts()
+        return checker.get_face_parts()
+
+    @classmethod
+    def split_items(cls):
+        """
+        Draw items merged in world space, and objects moved or edited
+        within SETTLE_TIME, drawn with their own matrix.
+        """
+        now = time.perf_counter()
+        changes = {}
+        static = []
+        live = []
+        for obj, mc_object in list(ModelValidator.objects.items()):
+            if is_removed(obj):
+                # the view is drawn before the timer syncing the objects
+                ModelValidator.remove_model_validator_object(obj)
+                continue
+            matrix = obj.matrix_world
+            state = (tuple(map(tuple, matrix)),
+                     tuple(checker.version for checker in mc_object.checkers))
+            last = cls._changes.get(obj)
+            if last is None:
+                # objects start merged
+                changed = -cls.SETTLE_TIME
+            elif last[0] != state:
+                changed = now
+            else:
+                changed = last[1]
+            changes[obj] = (state, changed)
+            if now - changed < cls.SETTLE_TIME:
+                live.append((mc_object, matrix))
+            else:
+                static.append((mc_object, matrix))
+        cls._changes = changes
+
+        # instance matrices only change when the instances are synced
+        instances = [(mc_object, matrix) for mc_object, matrix
+                     in ModelValidator._instances
+                     if not is_removed(mc_object._object)]
+        return static + instances, live
+
+    @classmethod
+    def local_batches(cls, mc_object, check, primitive):
+        """
+        Batches of the local coordinates and normals of mc_object, one per
+        part of its buffers, so that while a ValidationJob extends the
+        results, only the parts added or joined since the last draw are
+        built.
+        """
+        key = (mc_object, check, primitive)
+        version = cls.checker(mc_object, check).version
+        cached = cls._batches.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[2]
+
+        with Profiler.measure(mc_object.name, 'coordinates', check):
+            parts = tuple(cls.parts(mc_object, check, primitive))
+        batches = []
+        if cached is not None:
+            for part, cached_part, batch in zip(parts, cached[1], cached[2]):
+                if part is not cached_part:
+                    break
+                batches.append(batch)
+        for buffers in parts[len(batches):]:
+            batches.append(ChunkedBatch(cls.shader(), primitive, *buffers))
+        cls._batches[key] = (version, parts, batches)
+        return batches
+
+    @classmethod
+    def merged_batch(cls, check, primitive, items):
+        """
+        Batch of the flagged elements of check for items, packed in world
+        space in a single buffer, with normals scaled for the offset of
+        every item, see world_buffers. It is built again only when the
+        results or the matrix of one of the items have changed, or the
+        items themselves.
+        :param items: ModelValidatorObject and world matrix of every item
+        """
+        checkers = [cls.checker(mc_object, check)
+                    for mc_object, _matrix in items]
+        version = tuple(
+                (mc_object, checker.version, tuple(map(tuple, matrix)))
+                for (mc_object, matrix), checker in zip(items, checkers))
+
+        def builder():
+            coords = []
+            normals = []
+            indices = []
+            count = 0
+            for mc_object, matrix in items:
+                with Profiler.measure(mc_object.name, 'coordinates', check):
+                    buffers = cls.buffers(mc_object, check, primitive)
+                    co, no = world_buffers(matrix, buffers[0], buffers[1])
+                if primitive == 'TRIS':
+                    tris = buffers[2]
+                    if np is None:
+                        indices.extend(tuple(i + count for i in tri)
+                                       for tri in tris)
+                    else:
+                        indices.append(tris + count)
+                coords.append(co)
+                normals.append(no)
+                count += len(co)
+
+            if np is None:
+                coords = tuple(chain.from_iterable(coords))
+                normals = tuple(chain.from_iterable(normals))
+            else:
+                empty = np.zeros((0, 3), dtype=np.float32)
+                coords = np.concatenate(coords) if coords else empty
+                normals = np.concatenate(normals) if normals else empty
+                if primitive == 'TRIS':
+                    indices = np.concatenate(indices) if indices else \
+                        np.zeros((0, 3), dtype=np.int32)
+            return ChunkedBatch(cls.shader(), primitive, coords, normals,
+                                indices if primitive == 'TRIS' else None)
+
+        return cls.get_batch(cls._merged, (check, primitive), version,
+                             builder)
+
+    @classmethod
+    def bind(cls, matrix, margin, color):
+        shader = cls.shader()
         shader.bind()
+        shader.uniform_float("ViewProjectionMatrix",
+                             bpy.context.region_data.perspective_matrix)
+        shader.uniform_float("ModelMatrix", matrix)
+        shader.uniform_float("offset", margin)
         shader.uniform_float("color", color)
-        gpu.state.point_size_set(point_size)
-        batch.draw(shader)
+        return shader
+
+    @classmethod
+    def draw_primitive(cls, check, primitive, items, offset, color, budget):
+        """
+        Draw the merged batch of the static items, then the local batches
+        of every live item.
+        :param items: static and live items, see split_items
+        """
+        static, live = items
+        perspective_matrix = bpy.context.region_data.perspective_matrix
+        if static:
+            # the offset is applied by the shader, so that changing it
+            # doesn't build the merged batch again
+            batch = cls.merged_batch(check, primitive, static)
+            margin = normal_offset(None, offset)
+            cls.bind(Matrix.Identity(4), margin, color)
+            batch.draw(perspective_matrix,
+                       margin * max(normal_scale(matrix)
+                                    for _mc_object, matrix in static),
+                       budget)
+
+        for mc_object, matrix in live:
+            batches = cls.local_batches(mc_object, check, primitive)
+            margin = normal_offset(matrix, offset)
+            cls.bind(matrix, margin, color)
+            for batch in batches:
+                batch.draw(perspective_matrix @ matrix, margin, budget)
+
+    @classmethod
+    def draw_checker(cls, check, items, addon_prefs):
+        color = getattr(addon_prefs, f"{check}_color")
+        budget = addon_prefs.draw_budget
+        for primitive in cls.primitives(check):
+            if primitive == 'LINES':
+                gpu.state.blend_set("ALPHA")
+                gpu.state.line_width_set(addon_prefs.line_width)
+                cls.draw_primitive(check, primitive, items,
+                                   addon_prefs.edges_offset, color, budget)
+            elif primitive == 'TRIS':
+                gpu.state.blend_set("ALPHA")
+                cls.draw_primitive(check, primitive, items,
+                                   addon_prefs.edges_offset + 0.01, color,
+                                   budget)
+            else:
+                gpu.state.point_size_set(addon_prefs.point_size)
+                cls.draw_primitive(check, primitive, items,
+                                   addon_prefs.points_offset, color, budget)
 
     @classmethod
     def draw(cls):
@@ -127,67 +959,72 @@ class ModelValidatorGPU:
             addon_prefs = context.preferences.addons[
                 __name__.split(".")[0]].preferences
 
-            for check in model_validator.checker_options:
-                if getattr(model_validator, check):
-                    for mc_object in ModelValidator.objects.values():
-                        if check in ('non_manifold', 'triangles', 'ngons'):
-                            edges_offset = getattr(addon_prefs, 'edges_offset')
-                            coords = getattr(mc_object,
-                                             f"_{check}").get_edges(edges_offset)
-
-                            ModelValidatorGPU.draw_edges(
-                                    coords,
-                                    addon_prefs.line_width,
-                                    getattr(addon_prefs, f"{check}_color")
-                                    )
-
-                        if check in ('triangles', 'ngons'):
-                            face_offset = getattr(addon_prefs, 'edges_offset')
-                            coords, indices = getattr(mc_object,
-                                             f"_{check}").get_faces(face_offset)
-                            ModelValidatorGPU.draw_faces(
-                                    coords,
-                                    indices,
-                                    getattr(addon_prefs, f"{check}_color")
-                                    )
-
-                        if check in ('n_poles', 'e_poles', 'more_poles',
-                                     'isolated_verts'):
-                            point_offset = getattr(addon_prefs,
-                                                   'points_offset')
-                            coords = mc_object._poles.get_poles(
-                                    point_offset,
-                                    check
-                                    )
-
-                            ModelValidatorGPU.draw_points(
-                                    coords,
-                                    addon_prefs.point_size,
-                                    getattr(addon_prefs, f"{check}_color")
-                                    )
-
-            gpu.state.depth_test_set('NONE')
+            try:
+                if ModelValidator.objects or ModelValidator._instances:
+                    items = cls.split_items()
+                    for check in model_validator.checker_options:
+                        if getattr(model_validator, check):
+                            with Profiler.measure(None, 'draw', check):
+                                cls.draw_checker(check, items, addon_prefs)
+            finally:
+                # the state is shared with the other draw handlers
+                gpu.state.depth_test_set('NONE')
 
 
 class ModelValidator:
 
     _mode = ""
+    # ModelValidatorObject of every tracked object, shared by the objects
+    # using the same datas, see ModelValidatorObject.data_key
     objects = {}
+    _datas = {}
+    # datas and world matrix of the instances, in the scene wide mode
+    _instances = []
+    _instanced = set()
+
+    # datas waiting for a revalidation, and time of their last one
+    _pending = {}
+    _last_updates = {}
+    _sync_objects = False
+    _msgbus_owner = object()
+
+    # thread pool analyzing the objects, and the objects of its futures
+    _pool = None
+    _analyses = {}
 
     @staticmethod
     def poll():
         model_validator = bpy.context.window_manager.model_validator_props
         props = ("non_manifold", "triangles", "ngons",
-                 "n_poles", "e_poles", "more_poles", "isolated_verts")
+                 "n_poles", "e_poles", "more_poles", "isolated_verts",
+                 "doubles", "intersections")
         return model_validator.check_data and \
                any([getattr(model_validator, prop) for prop in props])
 
     @classmethod
     def reset_model_validator(cls):
         cls.set_mode("")
-        for mc_object in cls.objects.values():
-            del mc_object
+        cls.clear_objects()
+
+    @classmethod
+    def clear_objects(cls):
+        for mc_object in cls._datas.values():
+            mc_object.free()
         cls.objects.clear()
+        cls._datas.clear()
+        cls._pending.clear()
+        cls._last_updates.clear()
+        cls._instances = []
+        cls._instanced = set()
+        ModelValidatorGPU.clear_batches()
+
+    @staticmethod
+    def candidates():
+        """Objects to track, the selected ones or the whole scene ones"""
+        objects = bpy.context.view_layer.objects
+        if bpy.context.window_manager.model_validator_props.scene_wide:
+            return objects
+        return objects.selected
 
     @classmethod
     def mode(cls):
@@ -198,37 +1035,154 @@ class ModelValidator:
         cls._mode = states
 
     @classmethod
-    def add_model_validator_object(cls):
-        for obj in bpy.context.selected_objects:
+    def add_model_validator_object(cls, objects=None):
+        """
+        :param objects: objects to track, the candidates by default
+        """
+        if objects is None:
+            objects = cls.candidates()
+        for obj in objects:
             if obj.type != "MESH" or cls.objects.get(obj):
                 continue
-            cls.objects[obj] = ModelValidatorObject(obj)
+            mc_object = cls.objects[obj] = cls.data_object(obj)
+            mc_object.add_user(obj)
+
+    @classmethod
+    def data_object(cls, obj):
+        """
+        ModelValidatorObject of the datas of obj, created and analyzed on
+        their first use only.
+        """
+        key = ModelValidatorObject.data_key(obj)
+        mc_object = cls._datas.get(key)
+        if mc_object is None:
+            mc_object = cls._datas[key] = ModelValidatorObject(
+                    obj, deferred=True)
+            if mc_object.analyzing:
+                cls.analyze(mc_object)
+        return mc_object
+
+    @classmethod
+    def drop_data(cls, mc_object):
+        del cls._datas[mc_object.key]
+        cls._pending.pop(mc_object, None)
+        cls._last_updates.pop(mc_object, None)
+        ModelValidatorGPU.clear_batches(mc_object)
+        mc_object.free()
+
+    @classmethod
+    def analyze(cls, mc_object):
+        """
+        Classify the snapshot MeshAnalysis of mc_object in the thread pool,
+        numpy releasing the GIL, and derive the overlay datas and doubles
+        of its enabled checkers there too, process_analyses committing the
+        results back on the main thread.
+        """
+        if cls._pool is None:
+            cls._pool = ThreadPoolExecutor(max_workers=os.cpu_count())
+        future = cls._pool.submit(mc_object.analysis.analyze,
+                                  checkers=mc_object.enabled_checkers(),
+                                  distance=mc_object.doubles_distance)
+        cls._analyses[future] = mc_object
+        if not bpy.app.timers.is_registered(cls.process_analyses):
+            bpy.app.timers.register(cls.process_analyses,
+                                    first_interval=0.01)
+
+    @staticmethod
+    def process_analyses():
+        return ModelValidator.commit_analyses()
+
+    @classmethod
+    def commit_analyses(cls):
+        """
+        Commit the done analyses until the update budget is spent, the
+        others waiting for the next ticks.
+        """
+        addon_prefs = bpy.context.preferences.addons[
+            __name__.split(".")[0]].preferences
+        budget = addon_prefs.update_budget / 1000
+        start = time.perf_counter()
+
+        done = [future for future in cls._analyses if future.done()]
+        for committed, future in enumerate(done):
+            # at least one analysis is committed every tick
+            if committed and time.perf_counter() - start > budget:
+                break
+            mc_object = cls._analyses.pop(future)
+            if cls._datas.get(mc_object.key) is not mc_object:
+                continue
+            try:
+                analysis = future.result()
+            except Exception:
+                # a failing worker, or cache, shouldn't leave the object
+                # analyzing forever
+                analysis = mc_object.analysis
+                if analysis is None:
+                    continue
+                analysis.analyze(cache=False)
+            with Profiler.measure(mc_object.name, 'set_datas', 'commit'):
+                mc_object.commit_analysis(analysis)
+
+        if done:
+            tag_redraw()
+        return 0.01 if cls._analyses else None
 
     @classmethod
     def remove_model_validator_object(cls, obj):
-        mc_object = cls.objects.get(obj)
+        mc_object = cls.objects.pop(obj, None)
         if mc_object:
-            del mc_object
-            del cls.objects[obj]
+            mc_object.remove_user(obj)
+            if not mc_object.users and mc_object not in cls._instanced:
+                cls.drop_data(mc_object)
 
     @classmethod
     def reset_mc_objects(cls):
-        for mc_object in cls.objects.values():
-            del mc_object
-        cls.objects.clear()
+        cls.clear_objects()
         cls.add_model_validator_object()
+        cls.sync_instances()
 
     @classmethod
     def add_callback(cls):
         if cls.callback not in bpy.app.handlers.depsgraph_update_post:
             cls.add_model_validator_object()
+            cls.sync_instances()
             bpy.app.handlers.depsgraph_update_post.append(cls.callback)
+            for key in ((bpy.types.LayerObjects, "active"),
+                        (bpy.types.Object, "mode")):
+                bpy.msgbus.subscribe_rna(key=key,
+                                         owner=cls._msgbus_owner,
+                                         args=(),
+                                         notify=cls.queue_sync)
 
     @classmethod
     def remove_callback(cls):
         if cls.callback in bpy.app.handlers.depsgraph_update_post:
             bpy.app.handlers.depsgraph_update_post.remove(cls.callback)
+            bpy.msgbus.clear_by_owner(cls._msgbus_owner)
+            for timer in (cls.process_updates, cls.process_jobs,
+                          cls.process_analyses):
+                if bpy.app.timers.is_registered(timer):
+                    bpy.app.timers.unregister(timer)
+            cls._analyses.clear()
+            cls._sync_objects = False
             cls.reset_model_validator()
+            BMeshPool.clear()
+
+    @classmethod
+    def release(cls):
+        """Free everything held by the add-on, when it is unregistered"""
+        cls.remove_callback()
+        if cls._pool is not None:
+            cls._pool.shutdown(wait=False)
+            cls._pool = None
+
+    @classmethod
+    def update_scopes(cls):
+        """Follow the selection again, in the selection scoped mode"""
+        for mc_object in cls._datas.values():
+            if mc_object.is_scoped():
+                mc_object.set_scope(mc_object.bm_object)
+        tag_redraw()
 
     @classmethod
     def update_mc_object_datas(cls, checker_type):
@@ -238,46 +1192,228 @@ class ModelValidator:
         """
         if checker_type in {'e_poles', 'n_poles', 'more_poles',
                             'isolated_verts'}:
-            for mc_object in cls.objects.values():
-                mc_object._poles.set_datas()
+            checker_type = 'poles'
 
-        else:
-            for mc_object in cls.objects.values():
-                getattr(mc_object, f"_{checker_type}").set_datas()
+        for mc_object in cls._datas.values():
+            with Profiler.measure(mc_object.name, 'set_datas', checker_type):
+                mc_object.validate_checker(checker_type)
+
+    @classmethod
+    def start_jobs(cls):
+        if not bpy.app.timers.is_registered(cls.process_jobs):
+            bpy.app.timers.register(cls.process_jobs, first_interval=0)
+
+    @staticmethod
+    def process_jobs():
+        """Timer stepping the running ValidationJob of every object"""
+        return ModelValidator.step_jobs()
+
+    @classmethod
+    def step_jobs(cls):
+        addon_prefs = bpy.context.preferences.addons[
+            __name__.split(".")[0]].preferences
+        budget = addon_prefs.update_budget / 1000
+        start = time.perf_counter()
+
+        running = False
+        for mc_object in list(cls._datas.values()):
+            if mc_object.job is None:
+                continue
+            if mc_object in cls._pending:
+                # edited, the job starts again once revalidated
+                running = True
+                continue
+            remaining = budget - (time.perf_counter() - start)
+            if remaining <= 0:
+                running = True
+                break
+            with Profiler.measure(mc_object.name, 'set_datas', 'job'):
+                mc_object.step_job(remaining)
+            running = running or mc_object.job is not None
+
+        tag_redraw()
+        return 0.01 if running else None
 
     @staticmethod
     def callback(scene):
         """
-        Before doing anything, we check that the mode haven't changed.
-        If this is the case and we are in EDIT mode, we check the validity
-        of registered ModelValidatorObject instances. For each instance,
-        we update its bmesh representation.
-        """
-        if bpy.context.object is not None:
-            object_mode = bpy.context.object.mode
-            if object_mode != ModelValidator.mode():
-                ModelValidator.set_mode(object_mode)
-                ModelValidator.reset_mc_objects()
-
-            if object_mode == "OBJECT":
-                for obj in bpy.context.selected_objects:
-                    if not ModelValidator.objects.get(obj):
-                        ModelValidator.add_model_validator_object()
-
-                mc_objects = list(ModelValidator.objects.keys())
-                for obj in mc_objects:
-                    if obj not in list(bpy.data.objects) or not obj.select_get():
-                        ModelValidator.remove_model_validator_object(obj)
-
-            if object_mode == "EDIT" and  ModelValidator.poll():
-                depsgraph = bpy.context.evaluated_depsgraph_get()
-                for obj, mc_object in ModelValidator.objects.items():
-                    bm = mc_object.bm_object
-                    for update in depsgraph.updates:
-                        if update.id.original == obj and \
-                                mc_object.is_updated_datas(bm):
-                            mc_object.update_datas(bm)
+        Only queue the work of the depsgraph update, process_updates doing
+        it later, so that bursts of updates are coalesced.
+        """
+        with Profiler.measure(None, 'callback'):
+            ModelValidator.queue_updates()
 
-        else:
+    @staticmethod
+    def queue_sync():
+        """Sync the tracked objects with the mode and the selection soon"""
+        ModelValidator._sync_objects = True
+        ModelValidator.start_updates()
+
+    @staticmethod
+    def start_updates():
+        if not bpy.app.timers.is_registered(ModelValidator.process_updates):
+            bpy.app.timers.register(ModelValidator.process_updates,
+                                    first_interval=0)
+
+    @staticmethod
+    def updates_instances(update):
+        """
+        Whether a depsgraph update may add or remove objects of the scene,
+        or add, remove or move instances.
+        """
+        if isinstance(update.id, (bpy.types.Collection, bpy.types.Scene)):
+            return True
+        return isinstance(update.id, bpy.types.Object) and \
+            update.id.is_instancer
+
+    @classmethod
+    def queue_updates(cls):
+        depsgraph = bpy.context.evaluated_depsgraph_get()
+        # evaluated meshes also change with the modifiers in OBJECT mode
+        evaluated = use_evaluated()
+        revalidate = (cls.mode() == "EDIT" or evaluated) and cls.poll()
+        # the objects of the whole scene, unlike the selected ones, are
+        # only synced for updates of the collections or of the instancers,
+        # not for every transform
+        sync = not bpy.context.window_manager.model_validator_props.scene_wide
+        for update in depsgraph.updates:
+            if not sync and cls.updates_instances(update):
+                sync = True
+            obj = update.id.original
+            if not revalidate or not update.is_updated_geometry or \
+                    not isinstance(obj, bpy.types.Object) or \
+                    obj.type != "MESH":
+                continue
+            # the other meshes of the whole scene only report the updates
+            # of the objects they depend on, their own datas are unchanged
+            if not evaluated and not obj.data.is_editmode:
+                continue
+            mc_object = cls._datas.get(ModelValidatorObject.data_key(obj))
+            if mc_object is not None:
+                cls._pending[mc_object] = None
+
+        if sync:
+            cls.queue_sync()
+        elif cls._pending:
+            cls.start_updates()
+
+    @staticmethod
+    def process_updates():
+        """
+        bpy.app.timers identifies timers by function, so it has to be a
+        static function rather than a bound class method.
+        """
+        return ModelValidator.update_pending()
+
+    @classmethod
+    def update_pending(cls):
+        """
+        Timer syncing the tracked objects with the mode and the selection,
+        then revalidating the pending objects. An object is revalidated at
+        most once per update interval, and the timer stops revalidating
+        once the update budget of the tick is spent, the remaining objects
+        waiting for the next ticks.
+        """
+        addon_prefs = bpy.context.preferences.addons[
+            __name__.split(".")[0]].preferences
+        interval = addon_prefs.update_interval / 1000
+        budget = addon_prefs.update_budget / 1000
+
+        with Profiler.measure(None, 'updates'):
+            start = time.perf_counter()
+            if cls._sync_objects:
+                cls._sync_objects = False
+                cls.sync_objects()
+
+            updated = False
+            for mc_object in list(cls._pending):
+                now = time.perf_counter()
+                if now - start > budget:
+                    break
+
+                if cls._datas.get(mc_object.key) is not mc_object:
+                    # freed by a reset since it was queued
+                    del cls._pending[mc_object]
+                    continue
+                if now - cls._last_updates.get(mc_object, -interval) < \
+                        interval:
+                    continue
+
+                del cls._pending[mc_object]
+                cls._last_updates[mc_object] = now
+                mc_object.revalidate()
+                updated = True
+
+        if updated:
+            tag_redraw()
+
+        if cls._pending:
+            return interval
+        return None
+
+    @classmethod
+    def sync_objects(cls):
+        """
+        Before doing anything, we check that the mode haven't changed.
+        If this is the case, registered ModelValidatorObject instances are
+        created again. In OBJECT mode, they follow the selection, or the
+        whole scene and its instances in the scene wide mode.
+        """
+        active_object = bpy.context.view_layer.objects.active
+        if active_object is None:
             model_validator = bpy.context.window_manager.model_validator_props
             model_validator.check_data = False
+            return
+
+        object_mode = active_object.mode
+        if object_mode != cls.mode():
+            cls.set_mode(object_mode)
+            cls.reset_mc_objects()
+
+        if object_mode == "OBJECT":
+            # removed objects are not candidates anymore, so the difference
+            # of the two sets is enough, whatever the number of objects
+            candidates = set(cls.candidates())
+            tracked = set(cls.objects)
+            for obj in tracked - candidates:
+                cls.remove_model_validator_object(obj)
+            cls.add_model_validator_object(candidates - tracked)
+            cls.sync_instances()
+
+    @classmethod
+    def sync_instances(cls):
+        """
+        In the scene wide mode, draw the instances of the scene with the
+        datas of their object, which are only analyzed once.
+        """
+        instances = []
+        if bpy.context.window_manager.model_validator_props.scene_wide:
+            depsgraph = bpy.context.evaluated_depsgraph_get()
+            for instance in depsgraph.object_instances:
+                if instance.is_instance and instance.object.type == "MESH":
+                    mc_object = cls.data_object(instance.object.original)
+                    instances.append((mc_object,
+                                      instance.matrix_world.copy()))
+
+        instanced = {mc_object for mc_object, _matrix in instances}
+        for mc_object in cls._instanced - instanced:
+            if not mc_object.users:
+                cls.drop_data(mc_object)
+        cls._instances = instances
+        cls._instanced = instanced
+
+
+def is_removed(obj):
+    """Whether obj has been removed from the blend file"""
+    try:
+        obj.name
+    except ReferenceError:
+        return True
+    return False
+
+
+def tag_redraw():
+    for window in bpy.context.window_manager.windows:
+        for area in window.screen.areas:
+            if area.type == 'VIEW_3D':
+                area.tag_redraw()
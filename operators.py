@@ -0,0 +1,85 @@
+import bpy
+
+from bpy.types import Operator
+from bpy.props import EnumProperty, StringProperty
+from bpy_extras.io_utils import ExportHelper
+
+from .model_validator import ModelValidator
+from .report import ReportWriter
+
+
+class MODEL_VALIDATOR_OT_export_report(Operator, ExportHelper):
+    """Export the elements flagged by the enabled checkers of the tracked
+    objects"""
+    bl_idname = "model_validator.export_report"
+    bl_label = "Export Report"
+
+    filter_glob: StringProperty(
+            default="*.jsonl;*.csv",
+            options={'HIDDEN'}
+            )
+
+    report_format: EnumProperty(
+            name="Format",
+            items=(('jsonl', "JSON Lines", "One json record per line"),
+                   ('csv', "CSV", "One row per flagged element")),
+            default='jsonl'
+            )
+
+    @property
+    def filename_ext(self):
+        # ExportHelper.check fixes the extension when the format changes
+        return f".{self.report_format}"
+
+    @classmethod
+    def poll(cls, context):
+        return bool(ModelValidator.objects)
+
+    def execute(self, context):
+        skipped = []
+        with open(self.filepath, "w", newline="") as file:
+            writer = ReportWriter(file, self.report_format)
+            for obj, mc_object in ModelValidator.objects.items():
+                if mc_object.progress < 1.0:
+                    skipped.append(obj.name)
+                    continue
+                writer.write_object(
+                        obj.name, obj.data.name, mc_object.counts,
+                        ((check, mc_object.flagged(check))
+                         for check in mc_object.report_checkers()),
+                        partial=mc_object.scope is not None)
+
+        if skipped:
+            self.report({'WARNING'}, "Still validating, not exported: "
+                                     f"{', '.join(skipped)}")
+        return {'FINISHED'}
+
+
+class MODEL_VALIDATOR_OT_update_scope(Operator):
+    """Validate the current selection, in the selection scoped mode"""
+    bl_idname = "model_validator.update_scope"
+    bl_label = "Update Scope"
+
+    @classmethod
+    def poll(cls, context):
+        model_validator = context.window_manager.model_validator_props
+        return model_validator.selection_scope and context.mode == 'EDIT_MESH'
+
+    def execute(self, context):
+        ModelValidator.update_scopes()
+        return {'FINISHED'}
+
+
+classes = (
+    MODEL_VALIDATOR_OT_export_report,
+    MODEL_VALIDATOR_OT_update_scope
+)
+
+
+def register():
+    for cls in classes:
+        bpy.utils.register_class(cls)
+
+def unregister():
+    for cls in reversed(classes):
+        bpy.utils.unregister_class(cls)
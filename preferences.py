@@ -2,8 +2,19 @@ import bpy
 
 from bpy.types import AddonPreferences
 from bpy.props import (
+    BoolProperty,
     FloatVectorProperty,
-    FloatProperty)
+    FloatProperty,
+    IntProperty,
+    StringProperty)
+
+from .model_validator import ModelValidator
+
+
+def update_doubles_distance(self, context):
+    model_validator = context.window_manager.model_validator_props
+    if model_validator.check_data and model_validator.doubles:
+        ModelValidator.update_mc_object_datas('doubles')
 
 
 class ModelValidatorPreferences(AddonPreferences):
@@ -65,6 +76,14 @@ class ModelValidatorPreferences(AddonPreferences):
             description="Custom color for ngons"
             )
 
+    intersections_color: FloatVectorProperty(
+            name="Intersections",
+            default=(1.0, 0.0, 1.0, 0.4),
+            min=0.0, max=1.0, size=4,
+            subtype="COLOR",
+            description="Custom color for intersecting faces"
+            )
+
     e_poles_color: FloatVectorProperty(
             name="E poles",
             default=(0.5, 0.625, 1.0, 1.0),
@@ -97,6 +116,83 @@ class ModelValidatorPreferences(AddonPreferences):
             description="Custom color for isolated verts "
             )
 
+    doubles_color: FloatVectorProperty(
+            name="Doubles",
+            default=(1.0, 0.5, 0.0, 1.0),
+            min=0.0, max=1.0, size=4,
+            subtype="COLOR",
+            description="Custom color for doubles"
+            )
+
+    doubles_distance: FloatProperty(
+            name="Doubles Distance",
+            default=0.0001,
+            min=0.000001, max=1.0,
+            precision=6,
+            subtype="DISTANCE",
+            description="Verts closer than this distance to another vert, "
+                        "in the object space, are doubles",
+            update=update_doubles_distance
+            )
+
+    update_interval: IntProperty(
+            name="Update Interval",
+            default=100,
+            min=0, max=2000,
+            description="Minimum time between two revalidations of an "
+                        "edited object, in milliseconds"
+            )
+
+    update_budget: IntProperty(
+            name="Update Budget",
+            default=20,
+            min=1, max=1000,
+            description="Time the revalidations can take at once before "
+                        "the remaining ones are postponed, in milliseconds"
+            )
+
+    progressive_faces: IntProperty(
+            name="Progressive Validation",
+            default=200000,
+            min=0,
+            description="In EDIT mode, meshes with more faces are validated "
+                        "a chunk at a time, within the update budget, "
+                        "instead of freezing the interface"
+            )
+
+    draw_budget: IntProperty(
+            name="Draw Budget",
+            default=1000000,
+            min=1000,
+            description="Number of flagged elements of a checker drawn at "
+                        "full detail for an object, the overlay being "
+                        "decimated when more of them are in the view"
+            )
+
+    use_result_cache: BoolProperty(
+            name="Cache Results",
+            default=True,
+            description="Keep the results of the checkers on disk, so that "
+                        "unchanged meshes are not validated again"
+            )
+
+    cache_directory: StringProperty(
+            name="Cache Directory",
+            default="",
+            subtype="DIR_PATH",
+            description="Directory of the results cache, leave empty to use "
+                        "the Blender user configuration directory"
+            )
+
+    cache_size: IntProperty(
+            name="Cache Size",
+            default=256,
+            min=1, max=16384,
+            description="Maximum size of the results cache in megabytes, "
+                        "the least recently used results being removed "
+                        "first"
+            )
+
     def draw(self, context):
         layout = self.layout
         # --- FACES BOX --- #
@@ -114,16 +210,19 @@ class ModelValidatorPreferences(AddonPreferences):
         col_names.label(text="Triangles:")
         col_names.label(text="Ngons:")
         col_names.label(text="Non Manifold:")
+        col_names.label(text="Intersections:")
 
         col_props.prop(self, "triangles_color", text="")
         col_props.prop(self, "ngons_color", text="")
         col_props.prop(self, "non_manifold_color", text="")
+        col_props.prop(self, "intersections_color", text="")
 
         # --- POINTS BOX --- #
         box = layout.box()
         box.label(text="Points settings", icon="VERTEXSEL")
         box.prop(self, "point_size")
         box.prop(self, "points_offset")
+        box.prop(self, "doubles_distance")
         box.separator()
         row = box.row(align=True)
         split_name = row.split(factor=0.3)
@@ -135,11 +234,30 @@ class ModelValidatorPreferences(AddonPreferences):
         col_names.label(text="N Poles:")
         col_names.label(text="Poles more tha 5:")
         col_names.label(text="Isolated_verts:")
+        col_names.label(text="Doubles:")
 
         col_props.prop(self, "e_poles_color", text="")
         col_props.prop(self, "n_poles_color", text="")
         col_props.prop(self, "more_poles_color", text="")
         col_props.prop(self, "isolated_verts_color", text="")
+        col_props.prop(self, "doubles_color", text="")
+
+        # --- UPDATES BOX --- #
+        box = layout.box()
+        box.label(text="Updates settings", icon="TIME")
+        box.prop(self, "update_interval")
+        box.prop(self, "update_budget")
+        box.prop(self, "progressive_faces")
+        box.prop(self, "draw_budget")
+
+        # --- CACHE BOX --- #
+        box = layout.box()
+        box.label(text="Cache settings", icon="FILE_CACHE")
+        box.prop(self, "use_result_cache")
+        col = box.column()
+        col.active = self.use_result_cache
+        col.prop(self, "cache_directory")
+        col.prop(self, "cache_size")
 
 
 def register():
@@ -0,0 +1,100 @@
+import json
+import time
+
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+__all__ = ['Profiler']
+
+
+class Timing:
+    """Call count and last samples of one profiled stage."""
+
+    SAMPLES = 256
+
+    def __init__(self):
+        self.calls = 0
+        self.samples = deque(maxlen=self.SAMPLES)
+
+    def add(self, seconds):
+        self.calls += 1
+        self.samples.append(seconds)
+
+    @property
+    def last(self):
+        return self.samples[-1]
+
+    @property
+    def mean(self):
+        return sum(self.samples) / len(self.samples)
+
+    @property
+    def p95(self):
+        samples = sorted(self.samples)
+        return samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+
+    def as_dict(self):
+        return {"calls": self.calls, "last": self.last, "mean": self.mean,
+                "p95": self.p95}
+
+
+class Profiler:
+    """
+    Hot path timings of the add-on, per object, stage and checker. Stages
+    are 'callback', 'updates', 'set_datas', 'coordinates' and 'draw', the
+    object and the checker being None for the stages that are not specific
+    to them.
+    Nothing is recorded unless enabled.
+    """
+
+    enabled = False
+    _timings = {}
+
+    @classmethod
+    def enable(cls, state):
+        cls.enabled = state
+        if not state:
+            cls.reset()
+
+    @classmethod
+    def reset(cls):
+        cls._timings.clear()
+
+    @classmethod
+    def measure(cls, obj, stage, checker=None):
+        if not cls.enabled:
+            return nullcontext()
+        return cls._measure((obj, stage, checker))
+
+    @classmethod
+    @contextmanager
+    def _measure(cls, key):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            timing = cls._timings.get(key)
+            if timing is None:
+                timing = cls._timings[key] = Timing()
+            timing.add(time.perf_counter() - start)
+
+    @classmethod
+    def timings(cls):
+        """
+        Timings of every stage, with the calls count and the last, mean and
+        95th percentile durations in seconds.
+        """
+        return [{"object": key[0], "stage": key[1], "checker": key[2],
+                 **timing.as_dict()}
+                for key, timing in cls._timings.items()]
+
+    @classmethod
+    def object_timings(cls, obj):
+        """Timings of the stages of obj, see timings"""
+        return [timing for timing in cls.timings()
+                if timing["object"] == obj]
+
+    @classmethod
+    def dump(cls, path):
+        with open(path, "w") as file:
+            json.dump(cls.timings(), file, indent=2)
@@ -4,10 +4,12 @@ from bpy.types import PropertyGroup
 
 from bpy.props import (
     BoolProperty,
+    IntProperty,
     PointerProperty
     )
 
 from .model_validator import ModelValidator, ModelValidatorGPU
+from .profiling import Profiler
 
 
 def enable_depsgraph_handler(self, context):
@@ -26,6 +28,17 @@ def update_overlay(self, context):
     else:
         ModelValidatorGPU.remove_handler()
 
+def reset_mc_objects(self, context):
+    if self.check_data:
+        ModelValidator.reset_mc_objects()
+
+def update_scope_rings(self, context):
+    if self.check_data:
+        ModelValidator.update_scopes()
+
+def enable_profiling(self, context):
+    Profiler.enable(self.profiling)
+
 def mc_object_datas_updater(attr):
     def updater(self, context):
         if getattr(self, attr):
@@ -51,6 +64,48 @@ class ModelValidatorProperties(PropertyGroup):
             update=update_overlay
             )
 
+    evaluated: BoolProperty(
+            name="Modifiers",
+            default=False,
+            description="Validate the meshes with their modifiers applied",
+            update=reset_mc_objects
+            )
+
+    scene_wide: BoolProperty(
+            name="Whole Scene",
+            default=False,
+            description="Validate every mesh of the scene and its "
+                        "instances instead of the selection, each mesh "
+                        "being analyzed once",
+            update=reset_mc_objects
+            )
+
+    selection_scope: BoolProperty(
+            name="Selection Only",
+            default=False,
+            description="In EDIT mode, only validate the selected elements "
+                        "and their rings with the geometry checkers, so "
+                        "that edits of huge meshes are revalidated in a "
+                        "time depending on the selection only",
+            update=reset_mc_objects
+            )
+
+    scope_rings: IntProperty(
+            name="Rings",
+            default=0,
+            min=0, max=32,
+            description="Number of rings of verts around the selection "
+                        "validated as well",
+            update=update_scope_rings
+            )
+
+    profiling: BoolProperty(
+            name="Timings",
+            default=False,
+            description="Record and display the time spent by every checker",
+            update=enable_profiling
+            )
+
     non_manifold: BoolProperty(
             name="Non manifold",
             default=False,
@@ -100,8 +155,24 @@ class ModelValidatorProperties(PropertyGroup):
             update=mc_object_datas_updater("isolated_verts")
             )
 
+    doubles: BoolProperty(
+            name="Doubles",
+            default=False,
+            description="Display verts closer to another vert than the "
+                        "doubles distance",
+            update=mc_object_datas_updater("doubles")
+            )
+
+    intersections: BoolProperty(
+            name="Intersections",
+            default=False,
+            description="Display faces intersecting other faces",
+            update=mc_object_datas_updater("intersections")
+            )
+
     checker_options = ("non_manifold", "triangles", "ngons",
-                       "n_poles", "e_poles", "more_poles", "isolated_verts"
+                       "n_poles", "e_poles", "more_poles", "isolated_verts",
+                       "doubles", "intersections"
                        )
 
     def draw_options(self, layout):
@@ -127,5 +198,6 @@ def register():
             type=ModelValidatorProperties)
 
 def unregister():
+    ModelValidator.release()
     del bpy.types.WindowManager.model_validator_props
     bpy.utils.unregister_class(ModelValidatorProperties)
@@ -0,0 +1,112 @@
+import csv
+import json
+import os
+
+__all__ = ['ReportWriter']
+
+
+class ReportWriter:
+    """
+    Report of the elements flagged by the checkers, streamed to a file one
+    object at a time in JSON Lines or CSV. Indices are written CHUNK at a
+    time, so that the memory used doesn't grow with the size of the meshes.
+
+    JSON Lines records are an 'object' record with the counts of the mesh
+    and of every checker, followed by 'indices' records holding the next
+    flagged indices of a checker from start.
+    CSV rows are 'count' rows, with an empty checker for the counts of the
+    mesh, and one 'index' row per flagged element.
+    Unknown counts of the mesh are left out. Partial reports, of the
+    selection scoped mode, have "partial": true in their 'object' records,
+    or a 'partial' row.
+    """
+
+    CHUNK = 65536
+    FORMATS = ('jsonl', 'csv')
+    HEADER = ('record', 'object', 'mesh', 'checker', 'domain', 'value')
+    MESH_DOMAINS = ('vert', 'edge', 'face', 'tri')
+    DOMAINS = {'triangles': 'face',
+               'ngons': 'face',
+               'intersections': 'face',
+               'non_manifold': 'edge',
+               'n_poles': 'vert',
+               'e_poles': 'vert',
+               'more_poles': 'vert',
+               'isolated_verts': 'vert',
+               'doubles': 'vert'}
+
+    def __init__(self, file, fmt='jsonl', header=True):
+        """
+        :param file: text file opened with newline=''
+        :param header: write the CSV header, disabled for the parts of a
+        report concatenated afterwards
+        """
+        if fmt not in self.FORMATS:
+            raise ValueError(f"Unknown report format {fmt!r}")
+        self._file = file
+        self._fmt = fmt
+        self._csv = None
+        if fmt == 'csv':
+            self._csv = csv.writer(file)
+            if header:
+                self._csv.writerow(self.HEADER)
+
+    @classmethod
+    def path_format(cls, path):
+        """Format of the report at path, from its extension"""
+        fmt = os.path.splitext(path)[1][1:].lower()
+        return fmt if fmt in cls.FORMATS else 'jsonl'
+
+    @classmethod
+    def chunks(cls, indices):
+        """Start and list of the indices of every chunk of indices"""
+        for start in range(0, len(indices), cls.CHUNK):
+            yield start, indices[start:start + cls.CHUNK].tolist()
+
+    def write_object(self, name, mesh, counts, results, partial=False):
+        """
+        :param counts: verts, edges, faces and triangles counts of the mesh,
+        None when unknown
+        :param results: (checker, indices) pairs, indices being an int32
+        numpy array or array('i') of the flagged elements
+        :param partial: only a part of the mesh has been validated
+        """
+        results = list(results)
+        if self._csv is None:
+            self._write_json(name, mesh, counts, results, partial)
+        else:
+            self._write_csv(name, mesh, counts, results, partial)
+
+    def _write_json(self, name, mesh, counts, results, partial):
+        record = {"record": "object", "object": name, "mesh": mesh}
+        record.update((domain, count) for domain, count in
+                      zip(("verts", "edges", "faces", "tris"), counts)
+                      if count is not None)
+        if partial:
+            record["partial"] = True
+        record["checkers"] = {check: len(indices)
+                              for check, indices in results}
+        self._file.write(json.dumps(record) + "\n")
+
+        for check, indices in results:
+            for start, chunk in self.chunks(indices):
+                self._file.write(json.dumps({
+                        "record": "indices", "object": name,
+                        "checker": check, "domain": self.DOMAINS[check],
+                        "start": start, "indices": chunk}) + "\n")
+
+    def _write_csv(self, name, mesh, counts, results, partial):
+        if partial:
+            self._csv.writerow(("partial", name, mesh, "", "", 1))
+        self._csv.writerows(("count", name, mesh, "", domain, count)
+                            for domain, count in zip(self.MESH_DOMAINS,
+                                                     counts)
+                            if count is not None)
+        self._csv.writerows(("count", name, mesh, check, self.DOMAINS[check],
+                             len(indices)) for check, indices in results)
+
+        for check, indices in results:
+            domain = self.DOMAINS[check]
+            for _start, chunk in self.chunks(indices):
+                self._csv.writerows(("index", name, mesh, check, domain, i)
+                                    for i in chunk)
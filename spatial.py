@@ -0,0 +1,90 @@
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+__all__ = ['ChunkGrid']
+
+
+class ChunkGrid:
+    """
+    Elements of an overlay buffer sorted in the cells of a uniform grid, so
+    that the draw can skip the chunks of elements outside of the view, and
+    decimate the visible ones when they are too many.
+    Elements are rows of vert indices: one per point, two per edge and
+    three per triangle.
+    """
+
+    CHUNK_ELEMENTS = 4096
+
+    def __init__(self, co, elements):
+        """
+        :param co: array of shape (verts, 3) of the coordinates
+        :param elements: array of shape (elements, size) of vert indices
+        """
+        self.co = co
+        self.elements = elements
+        self._starts = np.zeros(1, dtype=np.int64)
+        self._boxes = np.zeros((0, 2, 3), dtype=np.float32)
+        if len(elements):
+            self._sort()
+
+    def _sort(self):
+        centers = self.co[self.elements].mean(axis=1)
+        low = centers.min(axis=0)
+        extent = np.maximum(centers.max(axis=0) - low, 1e-6)
+
+        # about CHUNK_ELEMENTS per cell, cells being cubes laid along the
+        # axes the elements spread on
+        cells = max(1.0, len(self.elements) / self.CHUNK_ELEMENTS)
+        axes = extent > extent.max() * 1e-3
+        size = (np.prod(extent[axes]) / cells) ** \
+            (1 / np.count_nonzero(axes))
+        resolution = np.ceil(extent / size).astype(np.int64)
+        cell = np.minimum(((centers - low) / size).astype(np.int64),
+                          resolution - 1)
+        keys = (cell[:, 0] * resolution[1] + cell[:, 1]) * resolution[2] + \
+            cell[:, 2]
+
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+        self.elements = self.elements[order]
+        self._starts = np.concatenate((
+                [0], np.flatnonzero(np.diff(keys)) + 1, [len(keys)]))
+
+        # bounding box of the verts of every chunk
+        verts = self.co[self.elements].reshape(len(self.elements), -1, 3)
+        low = np.minimum.reduceat(verts.min(axis=1), self._starts[:-1])
+        high = np.maximum.reduceat(verts.max(axis=1), self._starts[:-1])
+        self._boxes = np.stack((low, high), axis=1)
+
+    def __len__(self):
+        return len(self._boxes)
+
+    def count(self, chunks):
+        """Number of elements of chunks"""
+        sizes = np.diff(self._starts)
+        return int(sizes[chunks].sum())
+
+    def chunk(self, index, stride=1):
+        """Elements of the chunk of index, one every stride elements"""
+        start, end = self._starts[index], self._starts[index + 1]
+        return self.elements[start:end:stride]
+
+    def visible(self, matrix, margin=0.0):
+        """
+        Indices of the chunks whose bounding box, grown by margin, is not
+        fully out of one side of the view frustum.
+        :param matrix: 4x4 matrix from the coordinates to the clip space
+        """
+        low = self._boxes[:, 0] - margin
+        high = self._boxes[:, 1] + margin
+        corners = np.stack([
+                np.stack((x[:, 0], y[:, 1], z[:, 2]), axis=1)
+                for x in (low, high) for y in (low, high)
+                for z in (low, high)], axis=1)
+        clip = corners @ matrix[:3, :3].T + matrix[:3, 3]
+        w = corners @ matrix[3, :3] + matrix[3, 3]
+        outside = (np.all(clip < -w[..., None], axis=1) |
+                   np.all(clip > w[..., None], axis=1)).any(axis=1)
+        return np.flatnonzero(~outside)
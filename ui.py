@@ -1,6 +1,14 @@
 import bpy
 
 from .model_validator import ModelValidator as MC
+from .profiling import Profiler
+
+
+def timing_text(timing):
+    stage = " ".join(filter(None, (timing['stage'], timing['checker'])))
+    return (f"{stage}: {timing['last'] * 1000:.2f} ms -- "
+            f"mean {timing['mean'] * 1000:.2f} -- "
+            f"p95 {timing['p95'] * 1000:.2f} ({timing['calls']} calls)")
 
 
 def model_validator_panel(self, context):
@@ -24,6 +32,21 @@ def model_validator_panel(self, context):
 
     box.prop(addon_prefs, 'edges_offset')
     box.prop(addon_prefs, 'points_offset')
+    box.prop(model_validator, 'evaluated')
+    box.prop(model_validator, 'scene_wide')
+    row = box.row(align=True)
+    row.prop(model_validator, 'selection_scope')
+    if model_validator.selection_scope:
+        row.prop(model_validator, 'scope_rings')
+        row.operator("model_validator.update_scope", text="",
+                     icon='FILE_REFRESH')
+    box.prop(model_validator, 'profiling')
+    box.operator("model_validator.export_report", icon='EXPORT')
+
+    if Profiler.enabled:
+        col = box.column(align=True)
+        for timing in Profiler.object_timings(None):
+            col.label(text=timing_text(timing))
 
     for obj, mc_object in MC.objects.items():
         ob_box = layout.box()
@@ -35,6 +58,9 @@ def model_validator_panel(self, context):
                       text=obj.name,
                       icon=icon,
                       emboss=False)
+        if mc_object.progress < 1.0:
+            row_name.label(text=f"Validating {mc_object.progress:.0%}",
+                           icon="SORTTIME")
         if obj.model_validator_statistics:
             checker_options = (("non_manifold", "Non manifold"),
                                ("triangles", "Triangles"),
@@ -42,13 +68,23 @@ def model_validator_panel(self, context):
                                ("n_poles", "N poles"),
                                ("e_poles", "E poles"),
                                ("more_poles", "Poles > 5"),
-                               ("isolated_verts", "Isolated verts")
+                               ("isolated_verts", "Isolated verts"),
+                               ("doubles", "Doubles"),
+                               ("intersections", "Intersections")
                                )
 
             row = ob_box.row()
-            row.label(text=f"Verts: {mc_object._verts} -- Faces: "
-                           f"{mc_object._faces} -- Triangles: "
-                           f"{mc_object._tris} ")
+            if mc_object.scope is None:
+                row.label(text=f"Verts: {mc_object._verts} -- Faces: "
+                               f"{mc_object._faces} -- Triangles: "
+                               f"{mc_object._tris} ")
+            else:
+                row.label(text=f"Verts: {mc_object._verts} -- Faces: "
+                               f"{mc_object._faces} -- Validated faces: "
+                               f"{len(mc_object.scope[0])} ")
+            shared = " (shared)" if len(mc_object.users) > 1 else ""
+            ob_box.label(text=f"Memory: {mc_object.memory / 2**20:.2f} "
+                              f"MB{shared}")
 
             row_stats = ob_box.row()
             split = row_stats.split(factor=0.02)
@@ -67,6 +103,13 @@ def model_validator_panel(self, context):
                     col.label(
                             text=f"{name}: {count}")
 
+            if Profiler.enabled:
+                col = ob_box.column(align=True)
+                # timings are recorded under the object the datas are read
+                # from, shared by the objects using the same mesh
+                for timing in Profiler.object_timings(mc_object.name):
+                    col.label(text=timing_text(timing))
+
 
 def register():
     bpy.types.VIEW3D_PT_overlay.append(model_validator_panel)